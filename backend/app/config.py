@@ -1,5 +1,6 @@
 from pydantic_settings import BaseSettings
 import os
+import tempfile
 from dotenv import load_dotenv
 
 load_dotenv(override=True)
@@ -7,9 +8,24 @@ load_dotenv(override=True)
 class Settings(BaseSettings):
     MONGODB_URI: str = os.getenv("MONGODB_URI", "mongodb://localhost:27017")
     DATABASE_NAME: str = os.getenv("DATABASE_NAME", "voice_platform")
+    # Motor connection pool (see GET /api/health/ready for saturation)
+    MONGO_MAX_POOL_SIZE: int = int(os.getenv("MONGO_MAX_POOL_SIZE", "100"))
+    MONGO_MIN_POOL_SIZE: int = int(os.getenv("MONGO_MIN_POOL_SIZE", "10"))
+    MONGO_MAX_IDLE_TIME_MS: int = int(os.getenv("MONGO_MAX_IDLE_TIME_MS", "300000"))
+    MONGO_SERVER_SELECTION_TIMEOUT_MS: int = int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "5000"))
+    MONGO_CONNECT_TIMEOUT_MS: int = int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", "5000"))
+    MONGO_SOCKET_TIMEOUT_MS: int = int(os.getenv("MONGO_SOCKET_TIMEOUT_MS", "20000"))
+    MONGO_WAIT_QUEUE_TIMEOUT_MS: int = int(os.getenv("MONGO_WAIT_QUEUE_TIMEOUT_MS", "5000"))
+    # Comma-separated wire compressors, e.g. "zstd,snappy,zlib" (zstd/snappy need extra packages)
+    MONGO_COMPRESSORS: str = os.getenv("MONGO_COMPRESSORS", "")
     JWT_SECRET: str = os.getenv("JWT_SECRET", "super-secret-key-change-me")
     JWT_ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    # Validated-token cache; also bounds how long a revoked token is accepted elsewhere
+    PRINCIPAL_CACHE_SIZE: int = int(os.getenv("PRINCIPAL_CACHE_SIZE", "10000"))
+    PRINCIPAL_CACHE_TTL: float = float(os.getenv("PRINCIPAL_CACHE_TTL", "60"))
+    # pbkdf2 runs in a dedicated thread pool; at most this many hashes run at once
+    PASSWORD_HASH_WORKERS: int = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
     
     # AI Providers
     GROQ_API_KEY: str = os.getenv("GROQ_API_KEY", "")
@@ -17,4 +33,69 @@ class Settings(BaseSettings):
     DEEPGRAM_API_KEY: str = os.getenv("DEEPGRAM_API_KEY", "")
     ELEVENLABS_API_KEY: str = os.getenv("ELEVENLABS_API_KEY", "")
 
+    # Provider HTTP connection pools (one long-lived client per provider)
+    HTTP_MAX_CONNECTIONS: int = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "20"))
+    HTTP_KEEPALIVE_EXPIRY: float = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "60"))
+    HTTP_CONNECT_TIMEOUT: float = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+    HTTP_POOL_TIMEOUT: float = float(os.getenv("HTTP_POOL_TIMEOUT", "5"))
+    HTTP2_ENABLED: bool = os.getenv("HTTP2_ENABLED", "true").lower() == "true"
+
+    # STT upload limits (Groq Whisper rejects files over 25 MB anyway)
+    STT_MAX_UPLOAD_BYTES: int = int(os.getenv("STT_MAX_UPLOAD_BYTES", str(25 * 1024 * 1024)))
+    STT_MAX_DURATION_SECONDS: float = float(os.getenv("STT_MAX_DURATION_SECONDS", "300"))
+    # Pre-STT audio preprocessing: 16 kHz mono, silence trimmed, re-encoded ("opus" or "flac")
+    STT_PREPROCESS_ENABLED: bool = os.getenv("STT_PREPROCESS_ENABLED", "true").lower() == "true"
+    STT_PREPROCESS_FORMAT: str = os.getenv("STT_PREPROCESS_FORMAT", "opus")
+    STT_OPUS_BITRATE: int = int(os.getenv("STT_OPUS_BITRATE", "24000"))
+    STT_VAD_THRESHOLD_DB: float = float(os.getenv("STT_VAD_THRESHOLD_DB", "-45"))
+    STT_VAD_PADDING_MS: int = int(os.getenv("STT_VAD_PADDING_MS", "200"))
+    # Long-audio mode: clips longer than this are split at silences and transcribed in parallel
+    STT_LONG_AUDIO_SECONDS: float = float(os.getenv("STT_LONG_AUDIO_SECONDS", "30"))
+    STT_SEGMENT_SECONDS: float = float(os.getenv("STT_SEGMENT_SECONDS", "20"))
+    STT_SEGMENT_OVERLAP_MS: int = int(os.getenv("STT_SEGMENT_OVERLAP_MS", "300"))
+    STT_SEGMENT_CONCURRENCY: int = int(os.getenv("STT_SEGMENT_CONCURRENCY", "4"))
+    # Streamed WebSocket audio: server-side endpointing and background transcription
+    STT_ENDPOINT_SILENCE_MS: int = int(os.getenv("STT_ENDPOINT_SILENCE_MS", "700"))
+    STT_PAUSE_MS: int = int(os.getenv("STT_PAUSE_MS", "300"))
+    STT_MIN_SPEECH_MS: int = int(os.getenv("STT_MIN_SPEECH_MS", "200"))
+    STT_STREAM_SEGMENT_SECONDS: float = float(os.getenv("STT_STREAM_SEGMENT_SECONDS", "5"))
+    # Speculative LLM on interim transcripts (WebSocket streaming; clients opt in per connection)
+    LLM_SPECULATION_ENABLED: bool = os.getenv("LLM_SPECULATION_ENABLED", "false").lower() == "true"
+    # Word-level similarity the final transcript needs for a speculative response to be kept
+    LLM_SPECULATION_MATCH: float = float(os.getenv("LLM_SPECULATION_MATCH", "0.95"))
+
+    # Voice pipeline: capacity of the queues between stages (LLM deltas, outgoing events)
+    VOICE_PIPELINE_QUEUE_SIZE: int = int(os.getenv("VOICE_PIPELINE_QUEUE_SIZE", "16"))
+    # Sentence-pipelined TTS: sentences synthesized ahead of the one being played
+    TTS_PIPELINE_LOOKAHEAD: int = int(os.getenv("TTS_PIPELINE_LOOKAHEAD", "2"))
+    # Long-text TTS: texts over TTS_LONG_TEXT_CHARS synthesize in sentence groups in parallel
+    TTS_LONG_TEXT_CHARS: int = int(os.getenv("TTS_LONG_TEXT_CHARS", "600"))
+    TTS_GROUP_CHARS: int = int(os.getenv("TTS_GROUP_CHARS", "300"))
+    TTS_PARALLEL_SYNTHESIS: int = int(os.getenv("TTS_PARALLEL_SYNTHESIS", "3"))
+
+    # TTS audio cache (memory LRU in front of a disk store)
+    TTS_CACHE_ENABLED: bool = os.getenv("TTS_CACHE_ENABLED", "true").lower() == "true"
+    TTS_CACHE_MEMORY_BYTES: int = int(os.getenv("TTS_CACHE_MEMORY_BYTES", str(64 * 1024 * 1024)))
+    TTS_CACHE_DIR: str = os.getenv("TTS_CACHE_DIR", os.path.join(tempfile.gettempdir(), "voice_platform_tts"))
+    TTS_CACHE_DISK_BYTES: int = int(os.getenv("TTS_CACHE_DISK_BYTES", str(512 * 1024 * 1024)))
+
+    # Compiled skill prompt cache (invalidated on skill update/delete)
+    SKILL_PROMPT_CACHE_SIZE: int = int(os.getenv("SKILL_PROMPT_CACHE_SIZE", "1024"))
+    SKILL_PROMPT_CACHE_TTL: float = float(os.getenv("SKILL_PROMPT_CACHE_TTL", "300"))
+
+    # Agent config cache for the voice hot path
+    AGENT_CACHE_TTL: float = float(os.getenv("AGENT_CACHE_TTL", "60"))
+    AGENT_CACHE_SIZE: int = int(os.getenv("AGENT_CACHE_SIZE", "10000"))
+    # Requires a replica set; keeps several workers coherent on agent edits
+    AGENT_CACHE_CHANGE_STREAM: bool = os.getenv("AGENT_CACHE_CHANGE_STREAM", "false").lower() == "true"
+
+    # Voice previews pre-rendered at startup (comma-separated Edge voice IDs)
+    VOICE_PREVIEW_VOICES: str = os.getenv(
+        "VOICE_PREVIEW_VOICES",
+        "en-US-ChristopherNeural,en-US-GuyNeural,en-US-EricNeural,en-GB-RyanNeural,"
+        "en-AU-WilliamNeural,en-IN-PrabhatNeural,en-US-AriaNeural,en-US-JennyNeural,"
+        "en-US-MichelleNeural,en-GB-SoniaNeural,en-AU-NatashaNeural,en-IN-NeerjaNeural"
+    )
+
 settings = Settings()
@@ -1,16 +1,107 @@
+import asyncio
+import time
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import monitoring
 from .config import settings
+from .indexes import ensure_indexes
+
+
+class PoolMonitor(monitoring.ConnectionPoolListener):
+    """Tracks connection pool usage so pool size can be tuned against real concurrency."""
+
+    def __init__(self):
+        self.open_connections = 0
+        self.checked_out = 0
+        self.peak_checked_out = 0
+        self.checkout_failures = 0
+
+    def connection_created(self, event):
+        self.open_connections += 1
+
+    def connection_closed(self, event):
+        self.open_connections -= 1
+
+    def connection_checked_out(self, event):
+        self.checked_out += 1
+        self.peak_checked_out = max(self.peak_checked_out, self.checked_out)
+
+    def connection_checked_in(self, event):
+        self.checked_out -= 1
+
+    def connection_check_out_failed(self, event):
+        self.checkout_failures += 1
+
+    # Required by the listener interface; nothing to track
+    def pool_created(self, event): pass
+    def pool_ready(self, event): pass
+    def pool_cleared(self, event): pass
+    def pool_closed(self, event): pass
+    def connection_ready(self, event): pass
+    def connection_check_out_started(self, event): pass
+
 
 class Database:
     client: AsyncIOMotorClient = None
     db = None
+    pool_monitor: PoolMonitor = None
 
 db_instance = Database()
 
 async def connect_to_mongo():
-    db_instance.client = AsyncIOMotorClient(settings.MONGODB_URI)
+    db_instance.pool_monitor = PoolMonitor()
+    options = {
+        "maxPoolSize": settings.MONGO_MAX_POOL_SIZE,
+        "minPoolSize": settings.MONGO_MIN_POOL_SIZE,
+        "maxIdleTimeMS": settings.MONGO_MAX_IDLE_TIME_MS,
+        "serverSelectionTimeoutMS": settings.MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        "connectTimeoutMS": settings.MONGO_CONNECT_TIMEOUT_MS,
+        "socketTimeoutMS": settings.MONGO_SOCKET_TIMEOUT_MS,
+        "waitQueueTimeoutMS": settings.MONGO_WAIT_QUEUE_TIMEOUT_MS,
+        "event_listeners": [db_instance.pool_monitor],
+    }
+    if settings.MONGO_COMPRESSORS:
+        options["compressors"] = settings.MONGO_COMPRESSORS
+
+    db_instance.client = AsyncIOMotorClient(settings.MONGODB_URI, **options)
     db_instance.db = db_instance.client[settings.DATABASE_NAME]
     print(f"Connected to MongoDB: {settings.DATABASE_NAME}")
+    await warm_pool()
+    await ensure_indexes(db_instance.db)
+
+async def warm_pool():
+    """Open minPoolSize connections up front so the first requests don't pay connection setup."""
+    started = time.perf_counter()
+    try:
+        await asyncio.gather(*(
+            db_instance.client.admin.command("ping")
+            for _ in range(max(settings.MONGO_MIN_POOL_SIZE, 1))
+        ))
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        print(f"[DB] Pool warmed: {db_instance.pool_monitor.open_connections} connections in {elapsed_ms:.0f}ms")
+    except Exception as e:
+        print(f"[DB] Pool warm-up failed: {str(e)}")
+
+async def ping() -> float:
+    """Round-trip a ping and return latency in milliseconds. Raises if the server is unreachable."""
+    started = time.perf_counter()
+    await db_instance.client.admin.command("ping")
+    return (time.perf_counter() - started) * 1000
+
+def pool_stats() -> dict:
+    monitor = db_instance.pool_monitor
+    if monitor is None:
+        return {}
+    max_pool = settings.MONGO_MAX_POOL_SIZE or None  # 0 means unbounded
+    return {
+        "max_pool_size": settings.MONGO_MAX_POOL_SIZE,
+        "min_pool_size": settings.MONGO_MIN_POOL_SIZE,
+        "open_connections": monitor.open_connections,
+        "checked_out": monitor.checked_out,
+        "peak_checked_out": monitor.peak_checked_out,
+        "checkout_failures": monitor.checkout_failures,
+        "saturation": round(monitor.checked_out / max_pool, 3) if max_pool else None,
+        "peak_saturation": round(monitor.peak_checked_out / max_pool, 3) if max_pool else None,
+    }
 
 async def close_mongo_connection():
     db_instance.client.close()
@@ -0,0 +1,126 @@
+"""
+MongoDB Index Registry - Declarative indexes for every hot query
+Indexes are applied idempotently at startup by connect_to_mongo().
+
+Diagnostic: verify every route's query shape uses an index
+    python -m app.indexes
+Exits non-zero if any query shape falls back to a COLLSCAN.
+"""
+import asyncio
+import sys
+from bson import ObjectId
+from pymongo import ASCENDING, IndexModel
+from pymongo.errors import PyMongoError
+
+
+# =============================================================================
+# INDEX REGISTRY
+# =============================================================================
+INDEXES = {
+    "users": [
+        # Login/signup lookups; also enforces one account per email
+        IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+    ],
+    "agents": [
+        # Per-user listing (keyset on _id) and {_id, user_id} ownership checks
+        IndexModel([("user_id", ASCENDING), ("_id", ASCENDING)], name="user_id_id"),
+    ],
+    "skills": [
+        # The two branches of the {user_id} OR {is_system} library query
+        IndexModel([("user_id", ASCENDING), ("_id", ASCENDING)], name="user_id_id"),
+        IndexModel([("is_system", ASCENDING), ("_id", ASCENDING)], name="is_system_id"),
+    ],
+    "user_settings": [
+        IndexModel([("user_id", ASCENDING)], name="user_id_unique", unique=True),
+    ],
+}
+
+
+async def ensure_indexes(db):
+    """Create any missing registry indexes. Safe to run on every startup."""
+    for collection, models in INDEXES.items():
+        try:
+            names = await db[collection].create_indexes(models)
+            print(f"[DB] Indexes ready on {collection}: {', '.join(names)}")
+        except PyMongoError as e:
+            # e.g. duplicate emails blocking the unique index, or the server being down; keep serving, but loudly
+            print(f"[DB] Failed to create indexes on {collection}: {str(e)}")
+
+
+# =============================================================================
+# QUERY SHAPES - one entry per hot query issued by the routes
+# =============================================================================
+def _query_shapes():
+    user_id = str(ObjectId())
+    object_id = ObjectId()
+    owned_or_system = {"$or": [{"user_id": user_id}, {"is_system": True}]}
+
+    return [
+        ("auth: user by email", "users", {"email": "probe@example.com"}, None),
+        ("auth: token version by _id", "users", {"_id": object_id}, None),
+        ("agents: list for user", "agents", {"user_id": user_id}, [("_id", ASCENDING)]),
+        ("agents: list page after cursor", "agents", {"user_id": user_id, "_id": {"$gt": object_id}}, [("_id", ASCENDING)]),
+        ("agents: get owned agent", "agents", {"_id": object_id, "user_id": user_id}, None),
+        ("skills: list library", "skills", owned_or_system, [("_id", ASCENDING)]),
+        ("skills: list page after cursor", "skills", {**owned_or_system, "_id": {"$gt": object_id}}, [("_id", ASCENDING)]),
+        ("skills: get skill", "skills", {"_id": object_id, **owned_or_system}, None),
+        ("skills: batch resolve", "skills", {"_id": {"$in": [object_id]}, **owned_or_system}, None),
+        ("settings: user settings", "user_settings", {"user_id": user_id}, None),
+    ]
+
+
+def _find_stages(plan) -> set:
+    """Collect every stage name in a (possibly nested) explain plan."""
+    stages = set()
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            stages.add(plan["stage"])
+        for value in plan.values():
+            stages |= _find_stages(value)
+    elif isinstance(plan, list):
+        for item in plan:
+            stages |= _find_stages(item)
+    return stages
+
+
+async def verify_query_plans(db) -> list:
+    """
+    Run explain() on every query shape.
+    Returns a list of (name, collection, stages, ok) tuples.
+    """
+    results = []
+    for name, collection, query, sort in _query_shapes():
+        cursor = db[collection].find(query)
+        if sort:
+            cursor = cursor.sort(sort)
+        explain = await cursor.explain()
+        stages = _find_stages(explain.get("queryPlanner", {}).get("winningPlan", {}))
+        results.append((name, collection, sorted(stages), "COLLSCAN" not in stages))
+    return results
+
+
+async def _main() -> int:
+    from motor.motor_asyncio import AsyncIOMotorClient
+    from .config import settings
+
+    client = AsyncIOMotorClient(settings.MONGODB_URI)
+    db = client[settings.DATABASE_NAME]
+    try:
+        await ensure_indexes(db)
+        results = await verify_query_plans(db)
+    finally:
+        client.close()
+
+    for name, collection, stages, ok in results:
+        print(f"{'OK  ' if ok else 'FAIL'} {name:<32} {collection:<14} {', '.join(stages)}")
+
+    failures = [name for name, _, _, ok in results if not ok]
+    if failures:
+        print(f"{len(failures)} query shape(s) fall back to COLLSCAN")
+        return 1
+    print("All query shapes use indexes")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(_main()))
@@ -1,11 +1,25 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from .database import connect_to_mongo, close_mongo_connection
-from .config import settings
-from .routes import auth, agents, voice, websocket, skills, settings, voice_preview
+from .database import connect_to_mongo, close_mongo_connection, get_database
+from .config import settings as app_settings
+from .services.http_clients import init_http_clients, close_http_clients
+from .services.voice_catalog import voice_catalog
+from .services.agent_cache import agent_cache
+from .utils.auth import password_hasher
+from .utils.pagination import NEXT_CURSOR_HEADER
+from .utils.limits import MaxBodySizeMiddleware
+from .routes import auth, agents, voice, websocket, skills, settings, voice_preview, health
 
 app = FastAPI(title="Voice Platform API")
 
+# Audio uploads: refuse oversized bodies before they are spooled (multipart overhead allowed)
+# Added before CORS so CORS stays outermost and 413s still carry CORS headers
+app.add_middleware(
+    MaxBodySizeMiddleware,
+    max_bytes=app_settings.STT_MAX_UPLOAD_BYTES + 64 * 1024,
+    path_prefix="/api/voice"
+)
+
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
@@ -13,6 +27,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "Server-Timing"],
 )
 
 app.include_router(auth.router, prefix="/api")
@@ -22,13 +37,22 @@ app.include_router(websocket.router, prefix="/api")
 app.include_router(skills.router, prefix="/api")
 app.include_router(settings.router, prefix="/api")
 app.include_router(voice_preview.router, prefix="/api")
+app.include_router(health.router, prefix="/api")
 
 @app.on_event("startup")
 async def startup_db_client():
     await connect_to_mongo()
+    await init_http_clients()
+    voice_catalog.start()
+    if app_settings.AGENT_CACHE_CHANGE_STREAM:
+        agent_cache.start_watcher(get_database())
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    await voice_catalog.stop()
+    await agent_cache.stop_watcher()
+    await close_http_clients()
+    password_hasher.shutdown()
     await close_mongo_connection()
 
 @app.get("/")
@@ -53,6 +53,18 @@ class AgentResponse(AgentBase):
         populate_by_name=True,
     )
 
+class AgentSummary(BaseModel):
+    """Listing view of an agent (no system_prompt)."""
+    id: str
+    name: str
+    stt_provider: STTProvider = STTProvider.groq_whisper
+    llm_provider: LLMProvider = LLMProvider.groq
+    tts_provider: TTSProvider = TTSProvider.edge
+    voice_id: Optional[str] = None
+    skills: List[str] = Field(default_factory=list)
+    user_id: str
+    created_at: datetime
+
 class AgentInDB(AgentBase):
     user_id: str
     created_at: datetime = Field(default_factory=datetime.utcnow)
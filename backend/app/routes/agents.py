@@ -1,11 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from typing import List, Optional
 from datetime import datetime
 from bson import ObjectId
 from ..database import get_database
-from ..models.agent import AgentCreate, AgentUpdate, AgentResponse
+from ..models.agent import AgentCreate, AgentUpdate, AgentResponse, AgentSummary
 from ..models.user import UserResponse
 from ..utils.auth import get_current_user
+from ..services.agent_cache import agent_cache
+from ..utils.pagination import page_limit, cursor_filter, fetch_page
+
+# Summary fields only; system_prompt can be large and isn't shown in listings
+AGENT_SUMMARY_PROJECTION = {
+    "name": 1, "stt_provider": 1, "llm_provider": 1, "tts_provider": 1,
+    "voice_id": 1, "skills": 1, "user_id": 1, "created_at": 1
+}
 
 router = APIRouter(prefix="/agents", tags=["agents"])
 
@@ -28,27 +36,39 @@ async def create_agent(
         **agent_dict
     )
 
-@router.get("", response_model=List[AgentResponse])
+@router.get("", response_model=List[AgentSummary])
 async def list_agents(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Depends(page_limit),
     current_user: UserResponse = Depends(get_current_user),
     db = Depends(get_database)
 ):
-    """List all agents for the current user."""
-    agents = []
-    cursor = db.agents.find({"user_id": current_user.id})
-    async for agent in cursor:
-        agents.append(AgentResponse(
+    """
+    List agents for the current user, oldest first.
+    Paginated by _id: pass the X-Next-Cursor response header as `cursor` for the next page.
+    """
+    query = {"user_id": current_user.id, **cursor_filter(cursor)}
+    rows = await fetch_page(
+        db.agents.find(query, AGENT_SUMMARY_PROJECTION).sort("_id", 1).limit(limit + 1),
+        limit,
+        response
+    )
+    
+    return [
+        AgentSummary(
             id=str(agent["_id"]),
             name=agent["name"],
-            system_prompt=agent["system_prompt"],
             stt_provider=agent["stt_provider"],
             llm_provider=agent["llm_provider"],
             tts_provider=agent["tts_provider"],
             voice_id=agent.get("voice_id"),
+            skills=agent.get("skills", []),
             user_id=agent["user_id"],
             created_at=agent["created_at"]
-        ))
-    return agents
+        )
+        for agent in rows
+    ]
 
 @router.get("/{agent_id}", response_model=AgentResponse)
 async def get_agent(
@@ -108,6 +128,7 @@ async def update_agent(
             {"_id": ObjectId(agent_id)},
             {"$set": update_data}
         )
+        agent_cache.invalidate(agent_id)
     
     # Fetch updated agent
     updated_agent = await db.agents.find_one({"_id": ObjectId(agent_id)})
@@ -142,4 +163,6 @@ async def delete_agent(
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Agent not found")
     
+    agent_cache.invalidate(agent_id)
+    
     return {"message": "Agent deleted successfully"}
@@ -3,9 +3,10 @@ from fastapi.security import OAuth2PasswordRequestForm
 from datetime import timedelta, datetime
 from ..database import get_database
 from ..models.user import UserCreate, UserInDB, UserResponse
-from ..utils.auth import get_password_hash, verify_password, create_access_token
+from ..utils.auth import password_hasher, create_access_token, get_current_user, revoke_user_tokens
 from ..config import settings
 from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
@@ -19,8 +20,8 @@ async def signup(user_in: UserCreate, db = Depends(get_database)):
             detail="User with this email already exists"
         )
     
-    # Hash password
-    hashed_password = get_password_hash(user_in.password)
+    # Hash password (in the hashing pool, not on the event loop)
+    hashed_password = await password_hasher.hash(user_in.password)
     
     # Create user in DB
     user_dict = {
@@ -28,7 +29,14 @@ async def signup(user_in: UserCreate, db = Depends(get_database)):
         "password_hash": hashed_password,
         "created_at": datetime.utcnow()
     }
-    result = await db.users.insert_one(user_dict)
+    try:
+        result = await db.users.insert_one(user_dict)
+    except DuplicateKeyError:
+        # Concurrent signup with the same email lost the race to the unique index
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="User with this email already exists"
+        )
     
     return {
         "id": str(result.inserted_id),
@@ -38,7 +46,7 @@ async def signup(user_in: UserCreate, db = Depends(get_database)):
 @router.post("/login")
 async def login(user_in: UserCreate, db = Depends(get_database)):
     user = await db.users.find_one({"email": user_in.email})
-    if not user or not verify_password(user_in.password, user["password_hash"]):
+    if not user or not await password_hasher.verify(user_in.password, user["password_hash"]):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -46,8 +54,23 @@ async def login(user_in: UserCreate, db = Depends(get_database)):
         )
     
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    # user_id and token version let authenticated requests skip the user lookup
     access_token = create_access_token(
-        data={"sub": user["email"]}, expires_delta=access_token_expires
+        data={
+            "sub": user["email"],
+            "user_id": str(user["_id"]),
+            "tv": user.get("token_version", 0)
+        },
+        expires_delta=access_token_expires
     )
     
     return {"access_token": access_token, "token_type": "bearer"}
+
+@router.post("/revoke")
+async def revoke_tokens(
+    current_user: UserResponse = Depends(get_current_user),
+    db = Depends(get_database)
+):
+    """Sign out everywhere: invalidate all tokens issued to the current user."""
+    await revoke_user_tokens(db, current_user.id)
+    return {"message": "All sessions revoked"}
@@ -0,0 +1,69 @@
+"""
+Health Routes - Operational stats for sizing pools and caches
+"""
+from fastapi import APIRouter, Depends
+from fastapi.responses import JSONResponse
+from ..database import ping, pool_stats
+from ..services.http_clients import get_pool_stats
+from ..services.tts_cache import tts_cache
+from ..services.skills import skill_prompt_cache
+from ..services.agent_cache import agent_cache
+from ..services.audio import audio_preprocessor
+from ..services.speculation import speculation_stats
+from ..models.user import UserResponse
+from ..utils.auth import principal_cache, password_hasher, get_current_user
+
+router = APIRouter(prefix="/health", tags=["health"])
+
+
+@router.get("/ready")
+async def readiness():
+    """Readiness probe: MongoDB ping latency and connection pool saturation."""
+    try:
+        ping_ms = await ping()
+    except Exception as e:
+        return JSONResponse(
+            status_code=503,
+            content={"status": "unavailable", "error": str(e), "pool": pool_stats()}
+        )
+    
+    return {
+        "status": "ready",
+        "ping_ms": round(ping_ms, 2),
+        "pool": pool_stats()
+    }
+
+
+@router.get("/http-pools")
+async def http_pool_stats():
+    """Connection pool usage for each AI provider client."""
+    return get_pool_stats()
+
+
+@router.get("/caches")
+async def cache_stats():
+    """Hit/miss/eviction counters for in-process caches."""
+    return {
+        "tts": tts_cache.stats(),
+        "skill_prompts": skill_prompt_cache.stats(),
+        "agents": agent_cache.stats(),
+        "principals": principal_cache.stats()
+    }
+
+
+@router.get("/password-hashing")
+async def password_hashing_stats():
+    """Hashing pool usage; sustained waiting means logins are queueing behind pbkdf2."""
+    return password_hasher.stats()
+
+
+@router.get("/audio")
+async def audio_preprocessing_stats():
+    """Pre-STT audio preprocessing: bytes/seconds saved and average time per stage."""
+    return audio_preprocessor.stats()
+
+
+@router.get("/speculation")
+async def speculation_stats_by_agent(current_user: UserResponse = Depends(get_current_user)):
+    """Speculative LLM hit rate, wasted generations and latency saved, per agent the caller owns."""
+    return speculation_stats.stats(current_user.id)
@@ -1,7 +1,7 @@
 """
 Skills API Routes - CRUD for skill library with file upload
 """
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Response
 from bson import ObjectId
 from datetime import datetime
 from typing import Optional
@@ -12,9 +12,16 @@ from ..database import get_database
 from ..utils.auth import get_current_user
 from ..models.user import UserResponse
 from ..models.skill import SkillCreate, SkillUpdate, SkillResponse
+from ..services.skills import skill_prompt_cache
+from ..utils.pagination import page_limit, cursor_filter, fetch_page
 
 router = APIRouter(prefix="/skills", tags=["skills"])
 
+# Listing fields only; the markdown content is fetched per skill
+SKILL_SUMMARY_PROJECTION = {
+    "name": 1, "description": 1, "category": 1,
+    "user_id": 1, "is_system": 1, "created_at": 1
+}
 
 def parse_skill_content(content: str) -> dict:
     """Parse YAML frontmatter from skill markdown content."""
@@ -35,22 +42,32 @@ def parse_skill_content(content: str) -> dict:
 
 @router.get("")
 async def list_skills(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Depends(page_limit),
     current_user: UserResponse = Depends(get_current_user),
     db = Depends(get_database)
 ):
-    """Get all skills (user's own + system skills)."""
-    skills = []
-    
+    """
+    Get skills (user's own + system skills), oldest first.
+    Paginated by _id: pass the X-Next-Cursor response header as `cursor` for the next page.
+    """
     # Get user's skills and system skills
-    cursor = db.skills.find({
+    query = {
         "$or": [
             {"user_id": current_user.id},
             {"is_system": True}
-        ]
-    })
-    
-    async for skill in cursor:
-        skills.append({
+        ],
+        **cursor_filter(cursor)
+    }
+    rows = await fetch_page(
+        db.skills.find(query, SKILL_SUMMARY_PROJECTION).sort("_id", 1).limit(limit + 1),
+        limit,
+        response
+    )
+    
+    return [
+        {
             "id": str(skill["_id"]),
             "name": skill["name"],
             "description": skill.get("description", ""),
@@ -58,9 +75,9 @@ async def list_skills(
             "user_id": skill["user_id"],
             "is_system": skill.get("is_system", False),
             "created_at": skill.get("created_at", datetime.utcnow())
-        })
-    
-    return skills
+        }
+        for skill in rows
+    ]
 
 
 @router.get("/{skill_id}")
@@ -190,6 +207,7 @@ async def update_skill(
             {"_id": ObjectId(skill_id)},
             {"$set": update_data}
         )
+        skill_prompt_cache.invalidate(skill_id)
     
     return {"message": "Skill updated successfully"}
 
@@ -213,4 +231,6 @@ async def delete_skill(
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Skill not found or not deletable")
     
+    skill_prompt_cache.invalidate(skill_id)
+    
     return {"message": "Skill deleted successfully"}
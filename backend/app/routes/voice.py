@@ -1,25 +1,83 @@
 """
-Voice Chat Route - Orchestrates STT → LLM → TTS pipeline
+Voice Chat Route - HTTP adapter over the STT → LLM → TTS pipeline (services/pipeline.py)
 Uses API keys from .env file.
 """
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
-from fastapi.responses import Response
+from fastapi.responses import Response, StreamingResponse
 from bson import ObjectId
+from typing import AsyncIterator, Optional
+import asyncio
+import base64
+import json
 
+from ..config import settings
 from ..database import get_database
 from ..models.user import UserResponse
 from ..utils.auth import get_current_user
-from ..services.stt import transcribe_audio
-from ..services.llm import generate_response
-from ..services.tts import synthesize_speech
+from ..utils.timing import StageTimer
+from ..services.pipeline import VoicePipeline
+from ..services.stt import prepare_upload
+from ..services.tts import synthesize_speech_cached, stream_speech_cached
+from ..services.agent_cache import agent_cache
 
 router = APIRouter(prefix="/voice", tags=["voice"])
 
 
+# Pre-LLM stages of a turn; they overlap, so "setup" is less than their sum
+SETUP_STAGES = ["agent", "audio_prep", "stt", "prompt"]
+
+
+async def cancel_pending(*tasks: asyncio.Task):
+    """Cancel tasks still running and collect every outcome, so no failure goes unretrieved."""
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def ndjson_event(event: dict) -> bytes:
+    return (json.dumps(event) + "\n").encode("utf-8")
+
+
+async def stream_voice_turn(voice: VoicePipeline, user_text: str, prompt: Optional[asyncio.Future] = None) -> AsyncIterator[bytes]:
+    """
+    NDJSON events for one turn, written as they are produced:
+    transcript, then response_delta + audio_chunk per sentence (LLM and TTS overlapped),
+    then the full response and audio_complete. Failures after the stream has started
+    arrive as an {"type": "error"} event since the status code is already sent.
+    """
+    yield ndjson_event({"type": "transcript", "text": user_text, "agent_name": voice.agent["name"]})
+
+    chunk_index = 0
+    try:
+        async for event in voice.respond(user_text, prompt=prompt):
+            if event["type"] == "status":
+                continue
+            if event["type"] == "audio":
+                # Provider-sized chunks: only one small base64 copy is held at a time
+                yield ndjson_event({
+                    "type": "audio_chunk",
+                    "data": base64.b64encode(event["data"]).decode("utf-8"),
+                    "chunk_index": chunk_index,
+                    "segment_index": event["segment_index"]
+                })
+                chunk_index += 1
+                continue
+            if event["type"] == "audio_complete":
+                event = {"type": "audio_complete", "audio_type": "audio/mpeg", **event}
+                print(f"[VOICE] Streamed audio: {event['total_bytes']} bytes in {event['total_chunks']} chunks")
+            yield ndjson_event(event)
+    except Exception as e:
+        detail = e.detail if isinstance(e, HTTPException) else str(e)
+        print(f"[VOICE] Streaming error: {detail}")
+        yield ndjson_event({"type": "error", "message": f"Voice processing failed: {detail}"})
+
+
 @router.post("/chat")
 async def voice_chat(
     agent_id: str,
+    response: Response,
     audio: UploadFile = File(...),
+    stream: bool = False,
     current_user: UserResponse = Depends(get_current_user),
     db = Depends(get_database)
 ):
@@ -31,6 +89,15 @@ async def voice_chat(
     4. Synthesize speech with TTS
     5. Return audio response
     
+    With ?stream=true the reply is application/x-ndjson, one JSON event per line:
+    {"type": "transcript"}, then per sentence {"type": "response_delta"} followed by
+    its base64 {"type": "audio_chunk"} events (MP3), then {"type": "response"} with
+    the full text and {"type": "audio_complete"}. Playback can start at the first chunk.
+    
+    Agent lookup, upload preprocessing, STT and skill prompt assembly overlap where they
+    don't depend on each other; the Server-Timing header reports each stage and "setup",
+    the elapsed time until the LLM could start.
+    
     API keys are loaded from .env file.
     """
     print(f"[VOICE] Starting voice chat for agent: {agent_id}")
@@ -39,57 +106,66 @@ async def voice_chat(
     if not ObjectId.is_valid(agent_id):
         raise HTTPException(status_code=400, detail="Invalid agent ID")
     
-    agent = await db.agents.find_one({
-        "_id": ObjectId(agent_id),
-        "user_id": current_user.id
-    })
-    
-    if not agent:
-        raise HTTPException(status_code=404, detail="Agent not found")
-    
-    print(f"[VOICE] Agent found: {agent['name']}")
+    # Turn setup fans out: the upload is checked and preprocessed while the agent loads,
+    # and the skill prompt is assembled while STT runs, so only STT is on the critical path
+    timer = StageTimer()
+    agent_task = asyncio.create_task(timer.measure("agent", agent_cache.get(db, agent_id, current_user.id)))
+    upload_task = asyncio.create_task(timer.measure("audio_prep", prepare_upload(audio)))
+    tasks = [agent_task, upload_task]
     
     try:
-        # Get agent's provider preferences
-        stt_provider = agent.get("stt_provider", "groq_whisper")
-        llm_provider = agent.get("llm_provider", "groq")
-        tts_provider = agent.get("tts_provider", "edge")
-        agent_skills = agent.get("skills", [])
+        agent = await agent_task
+        
+        if not agent:
+            raise HTTPException(status_code=404, detail="Agent not found")
+        
+        print(f"[VOICE] Agent found: {agent['name']}")
+        
+        voice = VoicePipeline(agent, db, current_user.id)
+        prompt_task = asyncio.create_task(timer.measure("prompt", voice.prompt()))
+        tasks.append(prompt_task)
         
         # Step 1: Transcribe audio (STT)
-        print(f"[VOICE] Step 1: Transcribing with {stt_provider}...")
-        user_text = await transcribe_audio(audio, provider=stt_provider)
+        prepared = await upload_task
+        print(f"[VOICE] Step 1: Transcribing with {voice.stt_provider}...")
+        user_text = await timer.measure("stt", voice.transcribe(prepared))
         
         if not user_text.strip():
             raise HTTPException(status_code=400, detail="Could not transcribe audio")
         
         print(f"[VOICE] Transcribed: {user_text[:50]}...")
         
-        # Step 2: Generate LLM response with skills from database
-        print(f"[VOICE] Step 2: Generating with {llm_provider}...")
-        llm_response = await generate_response(
-            system_prompt=agent["system_prompt"],
-            user_message=user_text,
-            skills=agent_skills,
-            provider=llm_provider,
-            db=db,
-            user_id=current_user.id
-        )
-        print(f"[VOICE] LLM response: {llm_response[:50]}...")
-        
-        # Step 3: Synthesize speech (TTS)
-        print(f"[VOICE] Step 3: Synthesizing with {tts_provider}...")
+        await prompt_task
+        timer.mark("setup")
+        print(f"[VOICE] {timer.summary(SETUP_STAGES, 'setup')}")
         
-        # Clean text for TTS (remove markdown)
-        from ..utils.text_processing import clean_text_for_tts
-        tts_text = clean_text_for_tts(llm_response)
+        if stream:
+            # Steps 2+3 overlapped and streamed to the client as NDJSON
+            return StreamingResponse(
+                stream_voice_turn(voice, user_text, prompt_task),
+                media_type="application/x-ndjson",
+                headers={
+                    "Cache-Control": "no-cache",
+                    "X-Accel-Buffering": "no",
+                    "Server-Timing": timer.server_timing()
+                }
+            )
         
-        voice_id = agent.get("voice_id", "en-US-ChristopherNeural")
-        audio_bytes = await synthesize_speech(tts_text, provider=tts_provider, voice_id=voice_id)
+        # Steps 2+3: generate with skills from the database, then synthesize the whole reply
+        print(f"[VOICE] Steps 2+3: Generating with {voice.llm_provider}, synthesizing with {voice.tts_provider}...")
+        llm_response = ""
+        audio_chunks = []
+        with timer.stage("respond"):
+            async for event in voice.respond(user_text, overlap=False, prompt=prompt_task):
+                if event["type"] == "response":
+                    llm_response = event["text"]
+                elif event["type"] == "audio":
+                    audio_chunks.append(event["data"])
+        audio_bytes = b"".join(audio_chunks)
         print(f"[VOICE] Audio generated: {len(audio_bytes)} bytes")
+        response.headers["Server-Timing"] = timer.server_timing()
         
         # Return JSON with audio (base64) and full text for captions
-        import base64
         audio_base64 = base64.b64encode(audio_bytes).decode('utf-8')
         
         return {
@@ -104,6 +180,9 @@ async def voice_chat(
     except Exception as e:
         print(f"[VOICE] Unexpected error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Voice processing failed: {str(e)}")
+    finally:
+        # Nothing outlives the request: an early failure cancels the stages still running
+        await cancel_pending(*tasks)
 
 
 @router.post("/chat/text")
@@ -121,28 +200,22 @@ async def voice_chat_text(
     if not ObjectId.is_valid(agent_id):
         raise HTTPException(status_code=400, detail="Invalid agent ID")
     
-    agent = await db.agents.find_one({
-        "_id": ObjectId(agent_id),
-        "user_id": current_user.id
-    })
+    agent = await agent_cache.get(db, agent_id, current_user.id)
     
     if not agent:
         raise HTTPException(status_code=404, detail="Agent not found")
     
+    voice = VoicePipeline(agent, db, current_user.id)
+    
     try:
         # Step 1: Transcribe audio (STT)
-        user_text = await transcribe_audio(audio)
+        user_text = await voice.transcribe(audio)
         
         if not user_text.strip():
             raise HTTPException(status_code=400, detail="Could not transcribe audio")
         
         # Step 2: Generate LLM response
-        llm_response = await generate_response(
-            system_prompt=agent["system_prompt"],
-            user_message=user_text,
-            db=db,
-            user_id=current_user.id
-        )
+        llm_response = await voice.generate(user_text)
         
         return {
             "user_text": user_text,
@@ -170,10 +243,7 @@ async def speak_text(
     if not ObjectId.is_valid(agent_id):
         raise HTTPException(status_code=400, detail="Invalid agent ID")
     
-    agent = await db.agents.find_one({
-        "_id": ObjectId(agent_id),
-        "user_id": current_user.id
-    })
+    agent = await agent_cache.get(db, agent_id, current_user.id)
     
     if not agent:
         raise HTTPException(status_code=404, detail="Agent not found")
@@ -186,8 +256,21 @@ async def speak_text(
         from ..utils.text_processing import clean_text_for_tts
         tts_text = clean_text_for_tts(text)
         
-        # Synthesize
-        audio_bytes = await synthesize_speech(tts_text, provider=tts_provider, voice_id=voice_id)
+        if len(tts_text) > settings.TTS_LONG_TEXT_CHARS:
+            # Long text: sentence groups synthesize in parallel and stream as they're ready.
+            # Pull the first chunk here so a failure still returns a 500, not a broken stream.
+            audio_stream = stream_speech_cached(tts_text, provider=tts_provider, voice_id=voice_id)
+            first_chunk = await audio_stream.__anext__()
+            
+            async def body():
+                yield first_chunk
+                async for chunk in audio_stream:
+                    yield chunk
+            
+            return StreamingResponse(body(), media_type="audio/mpeg")
+        
+        # Synthesize (replays of the same message are served from the TTS cache)
+        audio_bytes = await synthesize_speech_cached(tts_text, provider=tts_provider, voice_id=voice_id)
         
         return Response(
             content=audio_bytes,
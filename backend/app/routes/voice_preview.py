@@ -1,38 +1,68 @@
 """
-Voice Preview Route - Generate sample audio for voice testing
+Voice Preview Route - Serve pre-rendered sample audio for voice testing
+Previews carry a strong ETag and a day-long Cache-Control: after that, browsers and
+proxies revalidate for a 304, which picks up a changed PREVIEW_TEXT.
 """
-from fastapi import APIRouter, HTTPException
-from fastapi.responses import Response
-from ..services.tts import synthesize_speech
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import JSONResponse, Response
+from ..services.voice_catalog import voice_catalog
 
 router = APIRouter(prefix="/voice-preview", tags=["voice-preview"])
 
+# Not immutable: the URL doesn't change with the preview text, so clients must revalidate
+PREVIEW_CACHE_CONTROL = "public, max-age=86400"
+VOICE_LIST_CACHE_CONTROL = "public, max-age=86400"
+
+
+@router.get("/voices")
+async def list_voices():
+    """List available Edge TTS voices (fetched once per process)."""
+    voices = await voice_catalog.load_voices()
+    if not voices:
+        raise HTTPException(status_code=503, detail="Voice list unavailable")
+    
+    return JSONResponse(content=voices, headers={"Cache-Control": VOICE_LIST_CACHE_CONTROL})
+
 
 @router.get("/{voice_id}")
-async def preview_voice(voice_id: str):
+async def preview_voice(voice_id: str, request: Request):
     """
-    Generate a sample audio preview for a specific Edge TTS voice.
-    Returns audio/mpeg file.
+    Get a sample audio preview for a specific Edge TTS voice.
+    Returns audio/mpeg file, or 304 when the client already has it.
     """
-    # Sample text for voice preview
-    sample_text = "Hello! This is a sample of my voice. I'm here to help you with your tasks."
-    
     try:
-        audio_bytes = await synthesize_speech(
-            text=sample_text,
-            provider="edge",
-            voice_id=voice_id
-        )
-        
-        return Response(
-            content=audio_bytes,
-            media_type="audio/mpeg",
-            headers={
-                "Content-Disposition": f"inline; filename=voice_preview_{voice_id}.mp3"
-            }
-        )
+        preview = await voice_catalog.get_preview(voice_id)
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail=f"Failed to generate voice preview: {str(e)}"
         )
+    
+    if preview is None:
+        raise HTTPException(status_code=404, detail="Unknown voice")
+    
+    headers = {
+        "ETag": preview.etag,
+        "Cache-Control": PREVIEW_CACHE_CONTROL
+    }
+    
+    if etag_matches(request.headers.get("if-none-match"), preview.etag):
+        return Response(status_code=304, headers=headers)
+    
+    return Response(
+        content=preview.audio,
+        media_type="audio/mpeg",
+        headers={
+            **headers,
+            "Content-Disposition": f"inline; filename=voice_preview_{voice_id}.mp3"
+        }
+    )
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Weak comparison per RFC 9110, as required for If-None-Match."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return etag in {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
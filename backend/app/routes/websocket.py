@@ -1,19 +1,291 @@
 """
 WebSocket Voice Chat Route - Real-time voice interaction with streaming
+Transport adapter over services/pipeline.py: turns, barge-in and streamed input are
+handled here; the STT → LLM → TTS work is the shared VoicePipeline.
 """
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends, HTTPException
 from bson import ObjectId
+from typing import AsyncIterator, Optional
+import asyncio
 import json
 import base64
+import binascii
 
+from ..config import settings
 from ..database import get_database
-from ..services.stt import transcribe_audio
-from ..services.llm import generate_response
-from ..services.tts import synthesize_speech
-from ..utils.auth import verify_token
+from ..services.pipeline import VoicePipeline
+from ..services.streaming_stt import Endpointer, streaming_available
+from ..services.audio import TARGET_SAMPLE_RATE
+from ..services.speculation import Speculator, speculation_stats
+from ..services.agent_cache import agent_cache
+from ..utils.auth import authenticate_token
 
 router = APIRouter(prefix="/ws", tags=["websocket"])
 
+MAX_FRAME_SIZE = 8192  # 8KB audio frames
+# Accepted audio_start sample rates (Hz) for streamed PCM
+MIN_STREAM_SAMPLE_RATE = 8000
+MAX_STREAM_SAMPLE_RATE = 48000
+
+
+class VoiceSocket:
+    """
+    Wraps the socket with the negotiated transport mode.
+    Binary mode: audio travels as raw binary frames, control messages as JSON text frames.
+    JSON mode: audio is base64-encoded inside JSON messages (legacy clients).
+    """
+
+    def __init__(self, websocket: WebSocket, binary: bool = False):
+        self.websocket = websocket
+        self.binary = binary
+        self.chunk_index = 0
+        # The turn task and the receive loop both send; keep each message whole
+        self.send_lock = asyncio.Lock()
+
+    async def send_event(self, message: dict):
+        async with self.send_lock:
+            await self.websocket.send_json(message)
+
+    async def send_audio(self, audio: bytes, segment_index: int = None) -> int:
+        """Send audio as frames of at most MAX_FRAME_SIZE, sliced without copying. Returns bytes sent."""
+        view = memoryview(audio)
+
+        for i in range(0, len(view), MAX_FRAME_SIZE):
+            frame = view[i:i + MAX_FRAME_SIZE]
+
+            if self.binary:
+                async with self.send_lock:
+                    await self.websocket.send_bytes(frame)
+            else:
+                message = {
+                    "type": "audio_chunk",
+                    "data": base64.b64encode(frame).decode('utf-8'),
+                    "chunk_index": self.chunk_index,
+                    "total_chunks": None
+                }
+                if segment_index is not None:
+                    message["segment_index"] = segment_index
+                await self.send_event(message)
+            self.chunk_index += 1
+
+        return len(view)
+
+    async def receive(self) -> tuple:
+        """
+        Receive the next frame.
+        Returns ("json", dict) for text frames or ("audio", bytes) for binary frames.
+        """
+        message = await self.websocket.receive()
+
+        if message["type"] == "websocket.disconnect":
+            raise WebSocketDisconnect(message.get("code", 1000))
+
+        if message.get("bytes") is not None:
+            return "audio", message["bytes"]
+
+        return "json", json.loads(message.get("text") or "{}")
+
+
+class StreamingUtterance:
+    """
+    One utterance streamed as 16-bit mono PCM. The endpointer watches for the end of
+    speech while the session transcribes what has arrived so far. Nothing reaches the
+    STT session until speech starts; the chunk before it is kept as pre-roll so the
+    onset of the first word isn't clipped. Speech starting also starts the turn's skill
+    prompt, which speculative replies and the final reply share.
+    """
+
+    def __init__(self, socket: VoiceSocket, voice: VoicePipeline, sample_rate: int, speculative: bool = False):
+        self.socket = socket
+        self.voice = voice
+        self.endpointer = Endpointer(sample_rate)
+        # Speculation needs an interim transcript at every pause, so segment at each one
+        self.session = voice.open_stream(sample_rate, self._on_interim, segment_seconds=0 if speculative else None)
+        self.speculator = Speculator(self._stream_llm) if speculative else None
+        self.prompt: Optional[asyncio.Task] = None
+        self._preroll = b""
+        self._started = False
+        self._paused = False
+        self._interim_sends = set()
+
+    @property
+    def has_speech(self) -> bool:
+        return self.endpointer.speech_frames > 0
+
+    def _stream_llm(self, user_text: str) -> AsyncIterator[str]:
+        return self.voice.stream_llm(user_text, self.prompt)
+
+    def _on_interim(self, text: str):
+        task = asyncio.create_task(self.socket.send_event({"type": "transcript_interim", "text": text}))
+        self._interim_sends.add(task)
+        task.add_done_callback(self._interim_sends.discard)
+        # An interim that arrives while the user is silent is stable enough to answer
+        if self.speculator is not None and self._paused:
+            self.speculator.speculate(text)
+
+    async def feed(self, pcm: bytes) -> list:
+        """Forward a chunk and return the endpointer events it produced."""
+        events = self.endpointer.feed(pcm)
+        if not self.has_speech:
+            self._preroll = pcm
+            return events
+
+        if not self._started:
+            self._started = True
+            self.prompt = asyncio.create_task(self.voice.prompt())
+            await self.session.start()
+            if self._preroll:
+                await self.session.send(self._preroll)
+                self._preroll = b""
+        await self.session.send(pcm)
+        for event in events:
+            if event == "pause":
+                self._paused = True
+                self.session.mark_pause()
+            elif event == "resume":
+                # The user kept talking; the speculated question is out of date
+                self._paused = False
+                if self.speculator is not None:
+                    self.speculator.abort()
+        return events
+
+    async def finish(self) -> str:
+        try:
+            return await self.session.finish() if self._started else ""
+        finally:
+            await self.session.aclose()
+
+    async def cancel_prompt(self):
+        """Cancel the prompt task if still running and collect its outcome."""
+        if self.prompt is not None:
+            self.prompt.cancel()
+            await asyncio.gather(self.prompt, return_exceptions=True)
+
+    async def aclose(self):
+        if self.speculator is not None:
+            self.speculator.abort()
+        await self.cancel_prompt()
+        await self.session.aclose()
+
+
+async def process_text_turn(
+    socket: VoiceSocket,
+    voice: VoicePipeline,
+    user_text: str,
+    overlap: bool,
+    deltas: Optional[AsyncIterator[str]] = None,
+    prompt: Optional[asyncio.Future] = None
+):
+    """
+    Run the LLM → TTS half of a turn for a finished transcript, or for an LLM stream
+    already under way (a speculative reply), writing the pipeline's events to the socket.
+    prompt is the turn's skill prompt task, started while STT ran.
+    """
+    print(f"[WS] Generating {'pipelined ' if overlap else ''}response...")
+    async for event in voice.respond(user_text, deltas, overlap=overlap, prompt=prompt):
+        if event["type"] == "audio":
+            # Forward each provider chunk as soon as it exists
+            await socket.send_audio(event["data"], event["segment_index"])
+            continue
+        if event["type"] == "audio_complete":
+            # Counted in socket frames, which is what the client received
+            event = {**event, "total_chunks": socket.chunk_index}
+            print(f"[WS] Audio streamed: {event['total_bytes']} bytes in {socket.chunk_index} chunks")
+        await socket.send_event(event)
+
+
+async def process_audio_turn(socket: VoiceSocket, voice: VoicePipeline, audio_bytes: bytes, mime_type: str, overlap: bool):
+    """Run one STT → LLM → TTS turn for a complete utterance."""
+    socket.chunk_index = 0
+
+    # Step 1: STT (straight from memory, no temp file)
+    print("[WS] Transcribing audio...")
+    await socket.send_event({"type": "status", "message": "Transcribing..."})
+
+    # The skill prompt is built per turn, alongside STT, so skill edits apply next turn
+    prompt = asyncio.create_task(voice.prompt())
+    try:
+        user_text = await voice.transcribe(audio_bytes, mime_type)
+
+        # Send transcript
+        await socket.send_event({
+            "type": "transcript",
+            "text": user_text
+        })
+        print(f"[WS] Transcript: {user_text[:50]}...")
+
+        await process_text_turn(socket, voice, user_text, overlap, prompt=prompt)
+    finally:
+        prompt.cancel()
+        await asyncio.gather(prompt, return_exceptions=True)
+
+
+async def process_streamed_turn(socket: VoiceSocket, voice: VoicePipeline, utterance: StreamingUtterance, overlap: bool):
+    """
+    Finish a streamed utterance at its endpoint. Most of the audio has already been
+    transcribed while the user spoke, so only the tail is left to wait for.
+    """
+    socket.chunk_index = 0
+    speculator = utterance.speculator
+
+    try:
+        user_text = await utterance.finish()
+        if not user_text.strip():
+            await socket.send_event({"type": "status", "message": "No speech detected"})
+            return
+
+        await socket.send_event({
+            "type": "transcript",
+            "text": user_text
+        })
+        print(f"[WS] Streamed transcript: {user_text[:50]}...")
+
+        deltas = None
+        if speculator is not None:
+            deltas = await speculator.resolve(user_text)
+            speculation_stats.record(voice.agent, speculator)
+            if speculator.generations:
+                await socket.send_event({
+                    "type": "speculation",
+                    "hit": deltas is not None,
+                    "latency_saved_ms": round(speculator.saved_ms)
+                })
+
+        await process_text_turn(socket, voice, user_text, overlap, deltas, utterance.prompt)
+    finally:
+        # Stops a speculative stream still generating, e.g. when the turn is interrupted
+        if speculator is not None:
+            speculator.abort()
+        await utterance.cancel_prompt()
+
+
+async def run_turn(socket: VoiceSocket, work, turn_id: int):
+    """One turn (a process_*_turn coroutine) as a cancellable task; processing errors are reported to the client."""
+    try:
+        await work
+    except asyncio.CancelledError:
+        print(f"[WS] Turn {turn_id} interrupted")
+        raise
+    except Exception as e:
+        print(f"[WS] Error processing audio: {str(e)}")
+        await socket.send_event({
+            "type": "error",
+            "message": f"Processing failed: {str(e)}"
+        })
+
+
+async def cancel_turn(turn: Optional[asyncio.Task]) -> bool:
+    """
+    Cancel an in-flight turn and wait until it has stopped, so no audio from it
+    follows. Cancellation closes its provider streams (LLM, TTS, STT) on the way out.
+    Returns True if a turn was actually interrupted.
+    """
+    if turn is None or turn.done():
+        return False
+    turn.cancel()
+    await asyncio.wait([turn])
+    return True
+
 
 @router.websocket("/voice/{agent_id}")
 async def websocket_voice_chat(
@@ -23,190 +295,241 @@ async def websocket_voice_chat(
 ):
     """
     WebSocket endpoint for real-time voice chat with streaming audio.
-    
+
     Protocol:
-    1. Client sends: {"type": "auth", "token": "jwt_token"}
-    2. Server responds: {"type": "auth", "status": "success"}
-    3. Client sends: {"type": "audio", "data": "base64_audio_data"}
+    1. Client sends: {"type": "auth", "token": "jwt_token", "pipeline": true, "binary": false}
+    2. Server responds: {"type": "auth", "status": "success", "pipeline": true, "binary": false}
+    3. Client sends: {"type": "audio", "data": "base64_audio_data", "mime_type": "audio/wav"}
     4. Server streams: {"type": "transcript", "text": "..."}
     5. Server streams: {"type": "response", "text": "..."}
     6. Server streams: {"type": "audio_chunk", "data": "base64_chunk"}
     7. Server sends: {"type": "audio_complete"}
+
+    Pipeline mode (default) overlaps LLM generation and TTS per sentence:
+    each sentence arrives as {"type": "response_delta", "text": "...", "segment_index": n}
+    followed by its audio chunks, so playback can begin after the first sentence.
+    The full {"type": "response"} text is sent once generation has finished.
+    Send "pipeline": false in the auth message for the sequential flow.
+
+    Binary mode ("binary": true in the auth message) drops base64 in both directions:
+    the client sends each utterance as one binary frame (format from the auth
+    "mime_type", default audio/wav), and the server sends audio as binary frames
+    instead of audio_chunk messages. All control messages stay JSON text frames.
+
+    Barge-in: each turn runs as a task while the socket keeps listening.
+    {"type": "interrupt"} cancels the in-flight turn (LLM/TTS requests and audio
+    streaming stop immediately); a new utterance also supersedes the current turn.
+    Either way the server confirms with {"type": "interrupted", "turn_id": n}
+    before anything from the next turn, so later audio belongs to the new turn.
+
+    Streaming mode sends audio while the user is still speaking, instead of one
+    message per finished utterance:
+    1. Client sends: {"type": "audio_start", "sample_rate": 16000}
+    2. Client streams 16-bit little-endian mono PCM as binary frames (or as
+       {"type": "audio_chunk", "data": "base64_pcm"} in JSON mode)
+    3. Server sends: {"type": "transcript_interim", "text": "..."} as transcription progresses
+    4. Server detects the end of speech (or the client sends {"type": "audio_end"}),
+       sends {"type": "endpoint"}, and the turn continues as above from "transcript"
+    Speech detected during a turn barges in on it. Chunks after an endpoint start
+    the next utterance with the same sample rate.
+
+    Speculative mode ("speculative": true in the auth message, streaming only) starts
+    streaming the LLM on the interim transcript whenever the user pauses. If the final
+    transcript matches it, the turn continues that stream and the server reports
+    {"type": "speculation", "hit": true, "latency_saved_ms": n} (how much sooner the first
+    sentence was ready); otherwise it is discarded and generated again ("hit": false).
     """
     await websocket.accept()
-    
+
     user = None
     agent = None
-    
+    turn: Optional[asyncio.Task] = None
+    turn_id = 0
+    stream_rate: Optional[int] = None
+    utterance: Optional[StreamingUtterance] = None
+
     try:
         # Step 1: Authenticate
         auth_message = await websocket.receive_json()
-        
+
         if auth_message.get("type") != "auth":
             await websocket.send_json({"type": "error", "message": "Authentication required"})
             await websocket.close()
             return
-        
+
         token = auth_message.get("token")
         if not token:
             await websocket.send_json({"type": "error", "message": "Token required"})
             await websocket.close()
             return
-        
-        # Verify JWT token
+
+        # Verify JWT token (user_id claim resolves the user without a lookup)
         try:
-            user = verify_token(token)
+            user = await authenticate_token(token, db)
         except Exception as e:
             await websocket.send_json({"type": "error", "message": "Invalid token"})
             await websocket.close()
             return
-        
+
         # Validate agent
         if not ObjectId.is_valid(agent_id):
             await websocket.send_json({"type": "error", "message": "Invalid agent ID"})
             await websocket.close()
             return
-        
-        agent = await db.agents.find_one({
-            "_id": ObjectId(agent_id),
-            "user_id": user["id"]
-        })
-        
+
+        agent = await agent_cache.get(db, agent_id, user.id)
+
         if not agent:
             await websocket.send_json({"type": "error", "message": "Agent not found"})
             await websocket.close()
             return
-        
+
+        pipeline = auth_message.get("pipeline", True)
+        binary = bool(auth_message.get("binary", False))
+        default_mime_type = auth_message.get("mime_type", "audio/wav")
+        speculative = bool(auth_message.get("speculative", settings.LLM_SPECULATION_ENABLED))
+        socket = VoiceSocket(websocket, binary=binary)
+        voice = VoicePipeline(agent, db, user.id)
+
         # Send auth success
         await websocket.send_json({
             "type": "auth",
             "status": "success",
-            "agent_name": agent["name"]
+            "agent_name": agent["name"],
+            "pipeline": pipeline,
+            "binary": binary,
+            "speculative": speculative
         })
-        
-        print(f"[WS] Client connected for agent: {agent['name']}")
-        
-        # Main message loop
+
+        print(f"[WS] Client connected for agent: {agent['name']} (binary={binary})")
+
+        # Main message loop: turns run as tasks so interrupts are heard mid-turn
         while True:
-            message = await websocket.receive_json()
-            
-            if message.get("type") == "audio":
-                # Process voice input
-                audio_data = message.get("data")
-                if not audio_data:
-                    await websocket.send_json({"type": "error", "message": "No audio data"})
+            kind, message = await socket.receive()
+            message_type = message.get("type") if kind == "json" else None
+
+            if message_type == "audio_start":
+                if not streaming_available():
+                    await socket.send_event({"type": "error", "message": "Audio streaming is not available"})
                     continue
-                
                 try:
-                    # Decode base64 audio
-                    audio_bytes = base64.b64decode(audio_data)
-                    
-                    # Step 1: STT
-                    print("[WS] Transcribing audio...")
-                    await websocket.send_json({"type": "status", "message": "Transcribing..."})
-                    
-                    # Create temporary file for STT
-                    import tempfile
-                    import os
-                    with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as temp_audio:
-                        temp_audio.write(audio_bytes)
-                        temp_audio_path = temp_audio.name
-                    
-                    try:
-                        # Transcribe using the file path
-                        from fastapi import UploadFile
-                        import io
-                        
-                        # Create UploadFile-like object
-                        class AudioFile:
-                            def __init__(self, data, filename):
-                                self.file = io.BytesIO(data)
-                                self.filename = filename
-                                self.content_type = "audio/wav"
-                            
-                            async def read(self):
-                                return self.file.read()
-                        
-                        audio_file = AudioFile(audio_bytes, "recording.wav")
-                        user_text = await transcribe_audio(audio_file)
-                        
-                        # Send transcript
-                        await websocket.send_json({
-                            "type": "transcript",
-                            "text": user_text
-                        })
-                        print(f"[WS] Transcript: {user_text[:50]}...")
-                        
-                        # Step 2: LLM
-                        print("[WS] Generating response...")
-                        await websocket.send_json({"type": "status", "message": "Thinking..."})
-                        
-                        llm_response = await generate_response(
-                            system_prompt=agent["system_prompt"],
-                            user_message=user_text
-                        )
-                        
-                        # Send LLM response
-                        await websocket.send_json({
-                            "type": "response",
-                            "text": llm_response
-                        })
-                        print(f"[WS] Response: {llm_response[:50]}...")
-                        
-                        # Step 3: TTS with streaming
-                        print("[WS] Synthesizing speech...")
-                        await websocket.send_json({"type": "status", "message": "Synthesizing..."})
-                        
-                        from ..utils.text_processing import clean_text_for_tts
-                        tts_text = clean_text_for_tts(llm_response)
-                        
-                        # Get agent voice
-                        voice_id = agent.get("voice_id", "en-US-ChristopherNeural")
-                        audio_bytes = await synthesize_speech(tts_text, voice_id=voice_id)
-                        
-                        # Stream audio in chunks
-                        chunk_size = 8192  # 8KB chunks
-                        total_chunks = (len(audio_bytes) + chunk_size - 1) // chunk_size
-                        
-                        for i in range(0, len(audio_bytes), chunk_size):
-                            chunk = audio_bytes[i:i + chunk_size]
-                            chunk_base64 = base64.b64encode(chunk).decode('utf-8')
-                            
-                            await websocket.send_json({
-                                "type": "audio_chunk",
-                                "data": chunk_base64,
-                                "chunk_index": i // chunk_size,
-                                "total_chunks": total_chunks
-                            })
-                        
-                        # Signal completion
-                        await websocket.send_json({
-                            "type": "audio_complete",
-                            "total_bytes": len(audio_bytes)
-                        })
-                        print(f"[WS] Audio streamed: {len(audio_bytes)} bytes in {total_chunks} chunks")
-                        
-                    finally:
-                        # Clean up temp file
-                        if os.path.exists(temp_audio_path):
-                            os.unlink(temp_audio_path)
-                
-                except Exception as e:
-                    print(f"[WS] Error processing audio: {str(e)}")
-                    await websocket.send_json({
+                    requested_rate = int(message.get("sample_rate", TARGET_SAMPLE_RATE))
+                except (TypeError, ValueError):
+                    requested_rate = None
+                if requested_rate is None or not MIN_STREAM_SAMPLE_RATE <= requested_rate <= MAX_STREAM_SAMPLE_RATE:
+                    await socket.send_event({
                         "type": "error",
-                        "message": f"Processing failed: {str(e)}"
+                        "message": f"sample_rate must be between {MIN_STREAM_SAMPLE_RATE} and {MAX_STREAM_SAMPLE_RATE} Hz"
                     })
-            
-            elif message.get("type") == "ping":
-                await websocket.send_json({"type": "pong"})
-            
+                    continue
+                if utterance is not None:
+                    await utterance.aclose()
+                    utterance = None
+                stream_rate = requested_rate
+                print(f"[WS] Streaming audio at {stream_rate}Hz")
+
+            elif (kind == "audio" and stream_rate) or message_type == "audio_chunk":
+                if not stream_rate:
+                    await socket.send_event({"type": "error", "message": "Send audio_start before audio_chunk"})
+                    continue
+                if kind == "audio":
+                    pcm = message
+                else:
+                    try:
+                        pcm = base64.b64decode(message.get("data") or "", validate=True)
+                    except binascii.Error:
+                        # Drop only this chunk; the utterance carries on
+                        await socket.send_event({"type": "error", "message": "Invalid base64 audio chunk"})
+                        continue
+                if utterance is None:
+                    utterance = StreamingUtterance(socket, voice, stream_rate, speculative)
+
+                try:
+                    events = await utterance.feed(pcm)
+                except Exception as e:
+                    print(f"[WS] Streaming STT failed: {str(e)}")
+                    await socket.send_event({"type": "error", "message": f"Transcription failed: {str(e)}"})
+                    await utterance.aclose()
+                    utterance = None
+                    continue
+
+                # Speaking over the agent barges in, as a new utterance does
+                if "speech_start" in events and await cancel_turn(turn):
+                    await socket.send_event({"type": "interrupted", "turn_id": turn_id, "cancelled": True})
+
+                if "endpoint" in events:
+                    if not utterance.has_speech:
+                        # Silence up to the duration cap; nothing to answer
+                        await utterance.aclose()
+                        utterance = None
+                        continue
+                    await socket.send_event({"type": "endpoint"})
+                    turn_id += 1
+                    turn = asyncio.create_task(
+                        run_turn(socket, process_streamed_turn(socket, voice, utterance, pipeline), turn_id)
+                    )
+                    utterance = None
+
+            elif message_type == "audio_end":
+                # Client-side endpoint (e.g. push-to-talk released)
+                if utterance is not None and not utterance.has_speech:
+                    # Only silence: nothing to answer, and no reason to cut off the agent
+                    await utterance.aclose()
+                    utterance = None
+                elif utterance is not None:
+                    await socket.send_event({"type": "endpoint"})
+                    if await cancel_turn(turn):
+                        await socket.send_event({"type": "interrupted", "turn_id": turn_id, "cancelled": True})
+                    turn_id += 1
+                    turn = asyncio.create_task(
+                        run_turn(socket, process_streamed_turn(socket, voice, utterance, pipeline), turn_id)
+                    )
+                    utterance = None
+
+            elif kind == "audio" or message_type == "audio":
+                # Process voice input
+                if kind == "audio":
+                    audio_bytes = message
+                    mime_type = default_mime_type
+                else:
+                    audio_data = message.get("data")
+                    if not audio_data:
+                        await socket.send_event({"type": "error", "message": "No audio data"})
+                        continue
+                    # Decode base64 audio (JSON mode only)
+                    try:
+                        audio_bytes = base64.b64decode(audio_data, validate=True)
+                    except binascii.Error:
+                        await socket.send_event({"type": "error", "message": "Invalid base64 audio data"})
+                        continue
+                    mime_type = message.get("mime_type", default_mime_type)
+
+                # A new utterance barges in on whatever is still playing
+                if await cancel_turn(turn):
+                    await socket.send_event({"type": "interrupted", "turn_id": turn_id, "cancelled": True})
+
+                turn_id += 1
+                turn = asyncio.create_task(
+                    run_turn(socket, process_audio_turn(socket, voice, audio_bytes, mime_type, pipeline), turn_id)
+                )
+
+            elif message_type == "interrupt":
+                interrupted = await cancel_turn(turn)
+                await socket.send_event({
+                    "type": "interrupted",
+                    "turn_id": turn_id,
+                    "cancelled": interrupted
+                })
+
+            elif message_type == "ping":
+                await socket.send_event({"type": "pong"})
+
             else:
-                await websocket.send_json({
+                await socket.send_event({
                     "type": "error",
-                    "message": f"Unknown message type: {message.get('type')}"
+                    "message": f"Unknown message type: {message_type}"
                 })
-    
+
     except WebSocketDisconnect:
         print(f"[WS] Client disconnected")
     except Exception as e:
@@ -216,6 +539,10 @@ async def websocket_voice_chat(
         except:
             pass
     finally:
+        # Nobody is listening any more; stop the provider requests too
+        await cancel_turn(turn)
+        if utterance is not None:
+            await utterance.aclose()
         try:
             await websocket.close()
         except:
@@ -0,0 +1,149 @@
+"""
+Agent Cache - In-process cache of agent configs for the voice hot path
+Entries expire after a TTL and are dropped explicitly when routes/agents.py
+updates or deletes an agent. An optional MongoDB change-stream watcher
+invalidates entries on writes from any worker (requires a replica set).
+"""
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+from bson import ObjectId
+from ..config import settings
+
+
+class AgentCache:
+    def __init__(self, ttl_seconds: float, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        # agent_id -> [lookups in flight, invalidations since the first started], so a lookup
+        # racing with an update can't re-cache the old doc. Only agents being loaded have
+        # an entry, so it stays as small as the number of concurrent misses.
+        self._loading: Dict[str, list] = {}
+        self._epoch = 0
+        self._watch_task: Optional[asyncio.Task] = None
+        self.change_stream_status = "disabled"
+
+        self.hits = 0
+        self.misses = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self.max_staleness = 0.0
+        self._staleness_total = 0.0
+
+    async def get(self, db, agent_id: str, user_id: str) -> Optional[dict]:
+        """
+        Return the agent if it exists and belongs to user_id, else None.
+        agent_id must already be a valid ObjectId string.
+        """
+        entry = self._entries.get(agent_id)
+        if entry is not None:
+            agent, loaded_at = entry
+            age = time.monotonic() - loaded_at
+            if age <= self.ttl_seconds:
+                self._entries.move_to_end(agent_id)
+                self.hits += 1
+                self.max_staleness = max(self.max_staleness, age)
+                self._staleness_total += age
+                return dict(agent) if agent["user_id"] == user_id else None
+            self._entries.pop(agent_id, None)
+            self.expirations += 1
+
+        self.misses += 1
+        loading = self._loading.setdefault(agent_id, [0, 0])
+        loading[0] += 1
+        generation = (self._epoch, loading[1])
+        try:
+            agent = await db.agents.find_one({
+                "_id": ObjectId(agent_id),
+                "user_id": user_id
+            })
+        finally:
+            current = (self._epoch, loading[1])
+            loading[0] -= 1
+            if not loading[0]:
+                del self._loading[agent_id]
+
+        if agent is None:
+            return None
+        if generation == current:
+            self._entries[agent_id] = (agent, time.monotonic())
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return dict(agent)
+
+    def invalidate(self, agent_id: str):
+        loading = self._loading.get(agent_id)
+        if loading is not None:
+            loading[1] += 1
+        if self._entries.pop(agent_id, None) is not None:
+            self.invalidations += 1
+
+    def clear(self):
+        self._epoch += 1
+        self._entries.clear()
+
+    # -------------------------------------------------------------------------
+    # Change-stream invalidation (multi-worker coherence)
+    # -------------------------------------------------------------------------
+    async def _watch(self, db):
+        backoff = 1.0
+        while True:
+            try:
+                async with db.agents.watch(
+                    [{"$match": {"operationType": {"$in": ["update", "replace", "delete"]}}}]
+                ) as stream:
+                    self.change_stream_status = "watching"
+                    backoff = 1.0
+                    async for change in stream:
+                        self.invalidate(str(change["documentKey"]["_id"]))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Standalone servers don't support change streams; TTL still bounds staleness
+                if "replica set" in str(e).lower():
+                    print(f"[AGENT CACHE] Change streams unavailable: {str(e)}")
+                    self.change_stream_status = "unsupported"
+                    return
+                print(f"[AGENT CACHE] Change stream error, retrying in {backoff:.0f}s: {str(e)}")
+                self.change_stream_status = "reconnecting"
+                # Writes may have been missed while disconnected
+                self.clear()
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 30.0)
+
+    def start_watcher(self, db):
+        if self._watch_task is None:
+            self.change_stream_status = "starting"
+            self._watch_task = asyncio.create_task(self._watch(db))
+
+    async def stop_watcher(self):
+        if self._watch_task is not None:
+            self._watch_task.cancel()
+            try:
+                await self._watch_task
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._watch_task = None
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+            "avg_staleness_seconds": round(self._staleness_total / self.hits, 3) if self.hits else None,
+            "max_staleness_seconds": round(self.max_staleness, 3),
+            "change_stream": self.change_stream_status,
+        }
+
+
+agent_cache = AgentCache(
+    ttl_seconds=settings.AGENT_CACHE_TTL,
+    max_entries=settings.AGENT_CACHE_SIZE
+)
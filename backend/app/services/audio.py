@@ -0,0 +1,332 @@
+"""
+Audio Preprocessing - Shrinks recordings before they are sent to STT
+decode (downmixed to mono and resampled to 16 kHz frame by frame) → trim silence (energy VAD) → encode (Opus/FLAC)
+
+Whisper and Deepgram both work on 16 kHz mono internally, so anything more is
+upload bytes and latency for nothing; leading/trailing silence is billed audio.
+Every stage is timed and its byte/duration savings recorded (GET /api/health/audio).
+
+Requires numpy and av (PyAV, bundles FFmpeg). Without them, or for audio that
+can't be decoded, the original recording is sent unchanged.
+"""
+import asyncio
+import io
+import time
+from typing import BinaryIO, Optional, Union
+from fastapi import HTTPException
+from ..config import settings
+
+try:
+    import av
+    import numpy as np
+except ImportError:  # preprocessing is skipped; STT gets the original audio
+    av = None
+    np = None
+
+TARGET_SAMPLE_RATE = 16000
+VAD_FRAME_MS = 20
+# How far either side of the target segment length to look for a quiet cut point
+SEGMENT_SEARCH_SECONDS = 5
+
+# Container, codec and MIME type for each output format
+OUTPUT_FORMATS = {
+    "opus": ("ogg", "libopus", "audio/ogg", "ogg"),
+    "flac": ("flac", "flac", "audio/flac", "flac"),
+}
+
+
+class PreprocessedAudio:
+    def __init__(self, audio: bytes, filename: str, mime_type: str, stats: dict, samples: "np.ndarray"):
+        self.audio = audio
+        self.filename = filename
+        self.mime_type = mime_type
+        self.stats = stats
+        # Trimmed 16 kHz mono samples, kept for segmenting long clips
+        self.samples = samples
+
+
+# =============================================================================
+# STAGES
+# =============================================================================
+def decode(source: Union[bytes, BinaryIO], max_seconds: float, target_rate: int = TARGET_SAMPLE_RATE) -> tuple:
+    """
+    Decode any container FFmpeg understands to float32 mono samples at target_rate.
+    Each frame is downmixed and resampled as it is decoded, so only the 16 kHz mono
+    result is held in memory, never the whole clip at its source rate and channel count.
+    Stops with a 413 once more than max_seconds have been decoded, so the true duration
+    limit applies to compressed formats without decoding all of an oversized clip.
+    Returns (mono, source_sample_rate, source_channels, source_seconds).
+    """
+    # mode="r": PyAV otherwise takes the mode from file.mode, and upload spools are "w+b"
+    container = av.open(io.BytesIO(source) if isinstance(source, bytes) else source, mode="r")
+    try:
+        stream = container.streams.audio[0]
+        sample_rate = stream.codec_context.sample_rate or stream.rate
+        channels = stream.codec_context.channels or 1
+        max_samples = int(max_seconds * sample_rate)
+        to_float = av.AudioResampler(format="fltp")
+        resampler = av.AudioResampler(format="fltp", layout="mono", rate=target_rate)
+        out = []
+        decoded = 0
+        for frame in container.decode(stream):
+            for converted in to_float.resample(frame):
+                decoded += converted.samples
+                out += resample_frame(resampler, downmix(converted.to_ndarray()), converted.sample_rate)
+            if decoded > max_samples:
+                raise HTTPException(
+                    status_code=413,
+                    detail=f"Audio too long (max {max_seconds:.0f}s)"
+                )
+        out += [f.to_ndarray()[0] for f in resampler.resample(None)]
+    finally:
+        container.close()
+
+    mono = np.concatenate(out) if out else np.zeros(0, dtype=np.float32)
+    return mono.astype(np.float32, copy=False), sample_rate, channels, decoded / sample_rate if sample_rate else 0.0
+
+
+def probe_duration(source: Union[bytes, BinaryIO]) -> Optional[float]:
+    """
+    Duration of any container FFmpeg understands, without decoding: from the container
+    header, else from packet timestamps (MediaRecorder webm has no header duration).
+    None if PyAV is missing or the input can't be read.
+    """
+    if av is None:
+        return None
+    try:
+        container = av.open(io.BytesIO(source) if isinstance(source, bytes) else source, mode="r")
+    except Exception:
+        return None
+    try:
+        if container.duration:
+            return container.duration / av.time_base
+        stream = container.streams.audio[0]
+        end = 0.0
+        for packet in container.demux(stream):
+            if packet.pts is None or packet.time_base is None:
+                continue
+            end = max(end, float((packet.pts + (packet.duration or 0)) * packet.time_base))
+        return end
+    except Exception:
+        return None
+    finally:
+        container.close()
+
+
+def downmix(samples: "np.ndarray") -> "np.ndarray":
+    """Average all channels of a (channels, samples) block into one."""
+    if samples.shape[0] == 1:
+        return samples[0]
+    return samples.mean(axis=0, dtype=np.float32)
+
+
+def resample_frame(resampler: "av.AudioResampler", mono: "np.ndarray", sample_rate: int) -> list:
+    """Feed one block of mono samples through a band-limited libswresample resampler."""
+    frame = av.AudioFrame.from_ndarray(mono[np.newaxis, :].astype(np.float32, copy=False), format="fltp", layout="mono")
+    frame.sample_rate = sample_rate
+    return [f.to_ndarray()[0] for f in resampler.resample(frame)]
+
+
+def frame_levels(mono: "np.ndarray", sample_rate: int) -> tuple:
+    """RMS level in dBFS of each VAD_FRAME_MS frame, vectorized. Returns (levels, frame_len)."""
+    frame_len = sample_rate * VAD_FRAME_MS // 1000
+    n_frames = mono.size // frame_len
+    frames = mono[:n_frames * frame_len].reshape(n_frames, frame_len)
+    rms = np.sqrt(np.mean(np.square(frames, dtype=np.float32), axis=1))
+    return 20 * np.log10(rms + 1e-10), frame_len
+
+
+def trim_silence(mono: "np.ndarray", sample_rate: int, threshold_db: float, padding_ms: int) -> "np.ndarray":
+    """
+    Energy VAD, vectorized over fixed frames: a frame is speech if its RMS level is
+    above threshold_db (dBFS) and within 35 dB of the loudest frame. Only leading and
+    trailing silence is cut (with padding) so pauses inside speech are kept.
+    Returns an empty array if nothing is voiced.
+    """
+    level_db, frame_len = frame_levels(mono, sample_rate)
+    if level_db.size == 0:
+        return mono
+
+    voiced = np.flatnonzero((level_db > threshold_db) & (level_db > level_db.max() - 35))
+    if voiced.size == 0:
+        return mono[:0]
+
+    padding = padding_ms * sample_rate // 1000
+    start = max(voiced[0] * frame_len - padding, 0)
+    end = min((voiced[-1] + 1) * frame_len + padding, mono.size)
+    return mono[start:end]
+
+
+def split_at_silence(mono: "np.ndarray", sample_rate: int, segment_seconds: float, overlap_ms: int) -> list:
+    """
+    Split into segments of about segment_seconds, cutting at the quietest frame within
+    SEGMENT_SEARCH_SECONDS of each target point. Each segment extends overlap_ms past
+    its cuts so a word straddling a cut is heard whole by at least one segment.
+    Returns [(start_sample, end_sample), ...] in order; short clips come back whole.
+    """
+    total = mono.size
+    target = int(segment_seconds * sample_rate)
+    if total <= target * 1.5:
+        return [(0, total)]
+
+    level_db, frame_len = frame_levels(mono, sample_rate)
+    search = SEGMENT_SEARCH_SECONDS * sample_rate
+    overlap = overlap_ms * sample_rate // 1000
+
+    cuts = []
+    start = 0
+    # Stop once the remainder fits in one segment, so the last one isn't a sliver
+    while total - start > target * 1.5:
+        lo = (start + max(target - search, target // 2)) // frame_len
+        hi = min((start + target + search) // frame_len, level_db.size)
+        quietest = lo + int(np.argmin(level_db[lo:hi]))
+        cut = quietest * frame_len + frame_len // 2
+        cuts.append(cut)
+        start = cut
+
+    edges = [0] + cuts + [total]
+    return [
+        (max(edges[i] - overlap, 0) if i else 0, min(edges[i + 1] + overlap, total))
+        for i in range(len(edges) - 1)
+    ]
+
+
+def encode(mono: "np.ndarray", sample_rate: int, output_format: str) -> bytes:
+    container_format, codec, _, _ = OUTPUT_FORMATS[output_format]
+    buffer = io.BytesIO()
+    container = av.open(buffer, mode="w", format=container_format)
+    try:
+        stream = container.add_stream(codec, rate=sample_rate, layout="mono")
+        if codec == "libopus":
+            stream.bit_rate = settings.STT_OPUS_BITRATE
+        pcm = (np.clip(mono, -1.0, 1.0) * 32767).astype(np.int16)
+        frame = av.AudioFrame.from_ndarray(pcm[np.newaxis, :], format="s16", layout="mono")
+        frame.sample_rate = sample_rate
+        for packet in stream.encode(frame):
+            container.mux(packet)
+        for packet in stream.encode(None):
+            container.mux(packet)
+    finally:
+        container.close()
+    return buffer.getvalue()
+
+
+# =============================================================================
+# PREPROCESSOR
+# =============================================================================
+class AudioPreprocessor:
+    # Downmixing and resampling happen frame by frame inside decode
+    STAGES = ("decode", "trim", "encode")
+
+    def __init__(self):
+        self.processed = 0
+        self.skipped = 0
+        self.failed = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.seconds_in = 0.0
+        self.seconds_out = 0.0
+        self.stage_ms = {stage: 0.0 for stage in self.STAGES}
+
+    @property
+    def available(self) -> bool:
+        return settings.STT_PREPROCESS_ENABLED and av is not None
+
+    def _run(self, source: Union[bytes, BinaryIO], size_in: int) -> PreprocessedAudio:
+        timings = {}
+
+        def timed(stage, func, *args):
+            started = time.perf_counter()
+            result = func(*args)
+            timings[stage] = round((time.perf_counter() - started) * 1000, 2)
+            return result
+
+        mono, sample_rate, channels, seconds_in = timed("decode", decode, source, settings.STT_MAX_DURATION_SECONDS)
+        mono = timed("trim", trim_silence, mono, TARGET_SAMPLE_RATE,
+                     settings.STT_VAD_THRESHOLD_DB, settings.STT_VAD_PADDING_MS)
+        seconds_out = mono.size / TARGET_SAMPLE_RATE
+
+        output_format = settings.STT_PREPROCESS_FORMAT
+        _, _, mime_type, extension = OUTPUT_FORMATS[output_format]
+        # Long clips are encoded per segment by the STT service instead
+        segmented = seconds_out > settings.STT_LONG_AUDIO_SECONDS
+        if segmented or not mono.size:
+            audio = b""
+        else:
+            audio = timed("encode", encode, mono, TARGET_SAMPLE_RATE, output_format)
+
+        stats = {
+            "input_bytes": size_in,
+            "output_bytes": None if segmented else len(audio),
+            "segmented": segmented,
+            "input_seconds": round(seconds_in, 3),
+            "output_seconds": round(seconds_out, 3),
+            "input_sample_rate": sample_rate,
+            "input_channels": channels,
+            "stage_ms": timings,
+        }
+        return PreprocessedAudio(audio, f"audio.{extension}", mime_type, stats, mono)
+
+    async def process(self, source: Union[bytes, BinaryIO], size_in: int) -> Optional[PreprocessedAudio]:
+        """
+        Preprocess off the event loop. Returns None when the original should be sent
+        instead: preprocessing disabled/unavailable, undecodable input, or an output
+        that is neither smaller nor shorter than the input.
+        """
+        if not self.available:
+            return None
+
+        try:
+            result = await asyncio.to_thread(self._run, source, size_in)
+        except HTTPException:
+            raise
+        except Exception as e:
+            self.failed += 1
+            print(f"[AUDIO] Preprocessing failed, sending original: {str(e)}")
+            return None
+        finally:
+            if not isinstance(source, bytes):
+                source.seek(0)
+
+        stats = result.stats
+        if (not stats["segmented"] and stats["output_bytes"] >= size_in
+                and stats["output_seconds"] >= stats["input_seconds"]):
+            self.skipped += 1
+            return None
+
+        self.processed += 1
+        if not stats["segmented"]:
+            self.bytes_in += size_in
+            self.bytes_out += stats["output_bytes"]
+        self.seconds_in += stats["input_seconds"]
+        self.seconds_out += stats["output_seconds"]
+        for stage, ms in stats["stage_ms"].items():
+            self.stage_ms[stage] += ms
+        print(
+            f"[AUDIO] {stats['input_bytes']}B/{stats['input_seconds']}s "
+            f"({stats['input_channels']}ch {stats['input_sample_rate']}Hz) → "
+            f"{stats['output_bytes']}B/{stats['output_seconds']}s {result.mime_type} {stats['stage_ms']}"
+        )
+        return result
+
+    def stats(self) -> dict:
+        return {
+            "enabled": settings.STT_PREPROCESS_ENABLED,
+            "available": av is not None,
+            "format": settings.STT_PREPROCESS_FORMAT,
+            "processed": self.processed,
+            "skipped": self.skipped,
+            "failed": self.failed,
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "byte_savings": round(1 - self.bytes_out / self.bytes_in, 3) if self.bytes_in else None,
+            "seconds_in": round(self.seconds_in, 3),
+            "seconds_out": round(self.seconds_out, 3),
+            "avg_stage_ms": {
+                stage: round(ms / self.processed, 2) if self.processed else None
+                for stage, ms in self.stage_ms.items()
+            },
+        }
+
+
+audio_preprocessor = AudioPreprocessor()
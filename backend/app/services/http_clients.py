@@ -0,0 +1,178 @@
+"""
+Shared HTTP Clients - One long-lived, pooled httpx client per AI provider
+Created on app startup and closed on shutdown, so every STT/LLM/TTS call
+reuses warm keep-alive (and HTTP/2 where available) connections instead of
+paying a fresh TCP+TLS handshake per turn.
+"""
+import time
+import httpx
+from typing import Dict, Optional
+from ..config import settings
+
+try:
+    import h2  # noqa: F401 - only needed to enable HTTP/2 in httpx
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+# =============================================================================
+# PROVIDER CONFIGURATION
+# =============================================================================
+# read: per-provider read timeout (seconds), matches the old per-call timeouts
+# http2: whether the provider endpoint negotiates HTTP/2 via ALPN
+PROVIDERS = {
+    "groq": {"base_url": "https://api.groq.com", "read": 60.0, "http2": True},
+    "gemini": {"base_url": "https://generativelanguage.googleapis.com", "read": 30.0, "http2": True},
+    "deepgram": {"base_url": "https://api.deepgram.com", "read": 60.0, "http2": True},
+    "elevenlabs": {"base_url": "https://api.elevenlabs.io", "read": 60.0, "http2": True},
+}
+
+
+class CountingTransport(httpx.AsyncBaseTransport):
+    """
+    Wraps the pooled transport to count every request, including ones that never get a
+    response (connect errors, timeouts, dropped connections), which event hooks miss.
+    A request counts as finished once its response headers arrive or it fails.
+    """
+
+    def __init__(self, wrapped: httpx.AsyncHTTPTransport):
+        self.wrapped = wrapped
+        self.holder: Optional["ProviderClient"] = None
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self.holder.request_started()
+        try:
+            response = await self.wrapped.handle_async_request(request)
+        except BaseException:
+            # Includes cancellation, so in_flight can't drift upwards
+            self.holder.request_finished(error=True)
+            raise
+        self.holder.request_finished(error=response.status_code >= 400)
+        return response
+
+    async def aclose(self):
+        await self.wrapped.aclose()
+
+
+class ProviderClient:
+    """A pooled AsyncClient plus lightweight usage counters for pool sizing."""
+
+    def __init__(self, name: str, client: httpx.AsyncClient, transport: "CountingTransport", http2: bool):
+        self.name = name
+        self.client = client
+        self.transport = transport
+        self.http2 = http2
+        self.created_at = time.monotonic()
+        self.requests = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.errors = 0
+
+    def request_started(self):
+        self.requests += 1
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+
+    def request_finished(self, error: bool = False):
+        self.in_flight -= 1
+        if error:
+            self.errors += 1
+
+    def connection_counts(self) -> Optional[dict]:
+        """
+        Open/idle connections in the pool. httpx exposes no public API for this, so it
+        reads httpcore's pool through private attributes; None if those have changed.
+        """
+        try:
+            connections = list(self.transport.wrapped._pool.connections)
+            return {
+                "connections": len(connections),
+                "idle_connections": sum(1 for conn in connections if conn.is_idle()),
+            }
+        except Exception:
+            return None
+
+    def stats(self) -> dict:
+        """Snapshot of pool usage."""
+        counts = self.connection_counts() or {"connections": None, "idle_connections": None}
+        return {
+            "http2": self.http2,
+            "requests": self.requests,
+            "in_flight": self.in_flight,
+            "peak_in_flight": self.peak_in_flight,
+            "errors": self.errors,
+            **counts,
+            "uptime_seconds": round(time.monotonic() - self.created_at, 1),
+        }
+
+
+_clients: Dict[str, ProviderClient] = {}
+
+
+def _build_client(name: str) -> ProviderClient:
+    config = PROVIDERS[name]
+    http2 = settings.HTTP2_ENABLED and HTTP2_AVAILABLE and config["http2"]
+
+    # Pool limits live on the transport once a custom one is supplied
+    transport = CountingTransport(httpx.AsyncHTTPTransport(
+        http2=http2,
+        limits=httpx.Limits(
+            max_connections=settings.HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY,
+        ),
+    ))
+    client = httpx.AsyncClient(
+        base_url=config["base_url"],
+        transport=transport,
+        timeout=request_timeout(config["read"]),
+    )
+    holder = ProviderClient(name, client, transport, http2)
+    transport.holder = holder
+    return holder
+
+
+async def init_http_clients():
+    """Create one pooled client per provider. Called from the app startup hook."""
+    for name in PROVIDERS:
+        if name not in _clients:
+            _clients[name] = _build_client(name)
+    print(f"[HTTP] Provider clients ready: {', '.join(_clients)} (http2={settings.HTTP2_ENABLED and HTTP2_AVAILABLE})")
+
+
+async def close_http_clients():
+    """Close all provider clients and their connection pools. Called on shutdown."""
+    for holder in _clients.values():
+        await holder.client.aclose()
+    _clients.clear()
+    print("[HTTP] Provider clients closed")
+
+
+def get_http_client(provider: str) -> httpx.AsyncClient:
+    """
+    Return the shared client for a provider.
+    Lazily creates it if the app startup hook has not run (e.g. scripts).
+    """
+    holder = _clients.get(provider)
+    if holder is None or holder.client.is_closed:
+        holder = _build_client(provider)
+        _clients[provider] = holder
+    return holder.client
+
+
+def request_timeout(read: float) -> httpx.Timeout:
+    """Per-request timeout override that keeps the configured connect/pool limits."""
+    return httpx.Timeout(read, connect=settings.HTTP_CONNECT_TIMEOUT, pool=settings.HTTP_POOL_TIMEOUT)
+
+
+def get_pool_stats() -> dict:
+    """Pool statistics for every provider client, keyed by provider name."""
+    return {
+        "limits": {
+            "max_connections": settings.HTTP_MAX_CONNECTIONS,
+            "max_keepalive_connections": settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            "keepalive_expiry": settings.HTTP_KEEPALIVE_EXPIRY,
+        },
+        "providers": {name: holder.stats() for name, holder in _clients.items()},
+    }
@@ -1,13 +1,15 @@
 """
 LLM Service with Groq and Gemini support + Database Skills
 Uses API keys from .env file.
+Streams token deltas so callers can start downstream work before generation ends.
 Optimized for conversational voice agents with proper instruction hierarchy.
 """
-import httpx
-from typing import Optional, List
+import json
+from typing import AsyncIterator, Optional, List, Tuple
 from fastapi import HTTPException
 from ..config import settings
 from .skills import build_skill_prompt_from_db
+from .http_clients import get_http_client, request_timeout
 
 
 # =============================================================================
@@ -84,75 +86,103 @@ def get_temperature(system_prompt: str) -> float:
     return 0.75
 
 
-async def generate_response_groq(final_prompt: str, user_message: str, model: str = "llama-3.3-70b-versatile", temperature: float = 0.75) -> str:
-    """Groq LLM - Supports multiple Llama models"""
+async def stream_response_groq(final_prompt: str, user_message: str, model: str = "llama-3.3-70b-versatile", temperature: float = 0.75) -> AsyncIterator[str]:
+    """Groq LLM - Streams token deltas over the OpenAI-compatible SSE API"""
     if not settings.GROQ_API_KEY:
         raise Exception("GROQ_API_KEY not configured in .env")
     
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        response = await client.post(
-            "https://api.groq.com/openai/v1/chat/completions",
-            headers={
-                "Authorization": f"Bearer {settings.GROQ_API_KEY}",
-                "Content-Type": "application/json"
-            },
-            json={
-                "model": model,
-                "messages": [
-                    {"role": "system", "content": final_prompt},
-                    {"role": "user", "content": user_message}
-                ],
-                "max_tokens": 200,
-                "temperature": temperature
-            }
-        )
-    
-    if response.status_code != 200:
-        raise Exception(f"Groq API error: {response.text}")
-    
-    return response.json()["choices"][0]["message"]["content"]
+    client = get_http_client("groq")
+    async with client.stream(
+        "POST",
+        "/openai/v1/chat/completions",
+        headers={
+            "Authorization": f"Bearer {settings.GROQ_API_KEY}",
+            "Content-Type": "application/json"
+        },
+        json={
+            "model": model,
+            "messages": [
+                {"role": "system", "content": final_prompt},
+                {"role": "user", "content": user_message}
+            ],
+            "max_tokens": 200,
+            "temperature": temperature,
+            "stream": True
+        },
+        timeout=request_timeout(30.0)
+    ) as response:
+        if response.status_code != 200:
+            await response.aread()
+            raise Exception(f"Groq API error: {response.text}")
+        
+        async for line in response.aiter_lines():
+            if not line.startswith("data:"):
+                continue
+            payload = line[5:].strip()
+            if payload == "[DONE]":
+                break
+            
+            choices = json.loads(payload).get("choices") or []
+            delta = choices[0].get("delta", {}).get("content") if choices else None
+            if delta:
+                yield delta
 
 
-async def generate_response_gemini(final_prompt: str, user_message: str, model: str = "gemini-1.5-flash", temperature: float = 0.75) -> str:
-    """Google Gemini - Supports multiple Gemini models"""
+async def stream_response_gemini(final_prompt: str, user_message: str, model: str = "gemini-1.5-flash", temperature: float = 0.75) -> AsyncIterator[str]:
+    """Google Gemini - Streams text deltas from streamGenerateContent (SSE)"""
     if not settings.GEMINI_API_KEY:
         raise Exception("GEMINI_API_KEY not configured in .env")
     
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        response = await client.post(
-            f"https://generativelanguage.googleapis.com/v1beta/models/{model}:generateContent?key={settings.GEMINI_API_KEY}",
-            headers={"Content-Type": "application/json"},
-            json={
-                "contents": [
-                    {"parts": [{"text": f"System: {final_prompt}\n\nUser: {user_message}"}]}
-                ],
-                "generationConfig": {
-                    "maxOutputTokens": 200,
-                    "temperature": temperature
-                }
+    client = get_http_client("gemini")
+    async with client.stream(
+        "POST",
+        f"/v1beta/models/{model}:streamGenerateContent?alt=sse&key={settings.GEMINI_API_KEY}",
+        headers={"Content-Type": "application/json"},
+        json={
+            "contents": [
+                {"parts": [{"text": f"System: {final_prompt}\n\nUser: {user_message}"}]}
+            ],
+            "generationConfig": {
+                "maxOutputTokens": 200,
+                "temperature": temperature
             }
-        )
-    
-    if response.status_code != 200:
-        raise Exception(f"Gemini API error: {response.text}")
-    
-    data = response.json()
-    return data["candidates"][0]["content"]["parts"][0]["text"]
+        },
+        timeout=request_timeout(30.0)
+    ) as response:
+        if response.status_code != 200:
+            await response.aread()
+            raise Exception(f"Gemini API error: {response.text}")
+        
+        async for line in response.aiter_lines():
+            if not line.startswith("data:"):
+                continue
+            
+            candidates = json.loads(line[5:]).get("candidates") or []
+            parts = candidates[0].get("content", {}).get("parts", []) if candidates else []
+            for part in parts:
+                if part.get("text"):
+                    yield part["text"]
 
 
-async def generate_response(
-    system_prompt: str, 
-    user_message: str,
+async def generate_response_groq(final_prompt: str, user_message: str, model: str = "llama-3.3-70b-versatile", temperature: float = 0.75) -> str:
+    """Groq LLM - Supports multiple Llama models"""
+    return "".join([delta async for delta in stream_response_groq(final_prompt, user_message, model, temperature)])
+
+
+async def generate_response_gemini(final_prompt: str, user_message: str, model: str = "gemini-1.5-flash", temperature: float = 0.75) -> str:
+    """Google Gemini - Supports multiple Gemini models"""
+    return "".join([delta async for delta in stream_response_gemini(final_prompt, user_message, model, temperature)])
+
+
+async def prepare_prompt(
+    system_prompt: str,
     skills: Optional[List[str]] = None,
-    provider: str = "groq",
     db = None,
     user_id: str = None
-) -> str:
+) -> Tuple[str, float]:
     """
-    Generate LLM response with proper instruction hierarchy:
-    BASE (constitution) → ROLE (personality) → SKILLS (capabilities) → STYLE (voice UX)
-    
-    API keys are loaded from .env file.
+    Everything before the LLM request that doesn't depend on the user's message:
+    skill loading, the final prompt and the temperature. Returns (final_prompt, temperature).
     """
     skill_content = None
     
@@ -166,20 +196,65 @@ async def generate_response(
     final_prompt = build_final_prompt(system_prompt, skill_content)
     
     # Get appropriate temperature for role
-    temperature = get_temperature(system_prompt)
+    return final_prompt, get_temperature(system_prompt)
+
+
+async def stream_response(
+    system_prompt: str, 
+    user_message: str,
+    skills: Optional[List[str]] = None,
+    provider: str = "groq",
+    db = None,
+    user_id: str = None,
+    prepared: Optional[Tuple[str, float]] = None
+) -> AsyncIterator[str]:
+    """
+    Stream LLM response text deltas as they arrive, with proper instruction hierarchy:
+    BASE (constitution) → ROLE (personality) → SKILLS (capabilities) → STYLE (voice UX)
+    
+    prepared: prepare_prompt() output computed ahead of time (e.g. while STT runs).
+    API keys are loaded from .env file.
+    """
+    if prepared is None:
+        prepared = await prepare_prompt(system_prompt, skills, db, user_id)
+    final_prompt, temperature = prepared
     
     print(f"[LLM] Using provider: {provider}, temperature: {temperature}")
     
+    # Route to correct provider and model
+    if provider == "gemini":
+        stream = stream_response_gemini(final_prompt, user_message, "gemini-1.5-flash", temperature)
+    elif provider == "gemini_2":
+        stream = stream_response_gemini(final_prompt, user_message, "gemini-2.0-flash-exp", temperature)
+    elif provider == "groq_instant":
+        stream = stream_response_groq(final_prompt, user_message, "llama-3.1-8b-instant", temperature)
+    else:  # Default to groq (llama-3.3-70b)
+        stream = stream_response_groq(final_prompt, user_message, "llama-3.3-70b-versatile", temperature)
+    
     try:
-        # Route to correct provider and model
-        if provider == "gemini":
-            return await generate_response_gemini(final_prompt, user_message, "gemini-1.5-flash", temperature)
-        elif provider == "gemini_2":
-            return await generate_response_gemini(final_prompt, user_message, "gemini-2.0-flash-exp", temperature)
-        elif provider == "groq_instant":
-            return await generate_response_groq(final_prompt, user_message, "llama-3.1-8b-instant", temperature)
-        else:  # Default to groq (llama-3.3-70b)
-            return await generate_response_groq(final_prompt, user_message, "llama-3.3-70b-versatile", temperature)
+        async for delta in stream:
+            yield delta
     except Exception as e:
         print(f"[LLM] Error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"LLM generation failed: {str(e)}")
+    finally:
+        await stream.aclose()
+
+
+async def generate_response(
+    system_prompt: str, 
+    user_message: str,
+    skills: Optional[List[str]] = None,
+    provider: str = "groq",
+    db = None,
+    user_id: str = None,
+    prepared: Optional[Tuple[str, float]] = None
+) -> str:
+    """
+    Generate the complete LLM response.
+    Thin wrapper that collects stream_response() deltas.
+    """
+    deltas = []
+    async for delta in stream_response(system_prompt, user_message, skills, provider, db, user_id, prepared):
+        deltas.append(delta)
+    return "".join(deltas)
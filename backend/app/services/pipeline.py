@@ -0,0 +1,226 @@
+"""
+Voice Pipeline - The STT → LLM → TTS turn engine shared by the HTTP and WebSocket routes
+The routes are transport adapters: they feed audio in and write the pipeline's events
+out (NDJSON lines or WebSocket messages). Every turn honors the agent's providers,
+voice and skills the same way on both transports.
+
+Stages run as tasks connected by bounded queues:
+    LLM deltas → [queue] → sentence TTS (synthesize_pipelined) → [queue] → transport
+A slow client fills the event queue, which stalls TTS, which stops pulling LLM text,
+which stops reading the provider stream: backpressure reaches the provider instead of
+buffering a whole reply in memory. Closing the event stream (client gone, barge-in)
+cancels every stage and with them the provider requests.
+
+Events are dicts with a "type", as sent to clients, except audio:
+{"type": "audio", "data": bytes, "segment_index": n} carries raw MP3 for the adapter to frame.
+"""
+import asyncio
+from contextlib import aclosing
+from typing import AsyncIterator, Optional, Union
+from fastapi import UploadFile
+from ..config import settings
+from .stt import transcribe_audio, transcribe_bytes, transcribe_prepared, PreparedUpload
+from .llm import generate_response, stream_response, prepare_prompt
+from .tts import stream_speech, stream_speech_long, synthesize_pipelined
+from .streaming_stt import open_session, StreamingSession
+from ..utils.text_processing import clean_text_for_tts
+
+
+def recording_filename(mime_type: str) -> str:
+    """STT providers infer the container from the file extension."""
+    extension = mime_type.split(";")[0].split("/")[-1] or "wav"
+    return f"recording.{extension}"
+
+
+class VoicePipeline:
+    """One agent's turn engine for one client (an HTTP request or a WebSocket connection)."""
+
+    def __init__(self, agent: dict, db=None, user_id: str = None, queue_size: int = None):
+        self.agent = agent
+        self.db = db
+        self.user_id = user_id
+        self.queue_size = queue_size or settings.VOICE_PIPELINE_QUEUE_SIZE
+
+        self.stt_provider = agent.get("stt_provider", "groq_whisper")
+        self.llm_provider = agent.get("llm_provider", "groq")
+        self.tts_provider = agent.get("tts_provider", "edge")
+        self.voice_id = agent.get("voice_id", "en-US-ChristopherNeural")
+        self.skills = agent.get("skills", [])
+
+    # =========================================================================
+    # STT
+    # =========================================================================
+    async def transcribe(self, audio: Union[bytes, UploadFile, PreparedUpload], mime_type: str = "audio/wav") -> str:
+        """
+        Transcribe a complete utterance: an upload (optionally already prepared with
+        prepare_upload()), or in-memory bytes of the given MIME type.
+        """
+        if isinstance(audio, bytes):
+            return await transcribe_bytes(audio, recording_filename(mime_type), mime_type, self.stt_provider)
+        if isinstance(audio, PreparedUpload):
+            return await transcribe_prepared(audio, self.stt_provider)
+        return await transcribe_audio(audio, provider=self.stt_provider)
+
+    def open_stream(self, sample_rate: int, on_interim=None, segment_seconds: Optional[float] = None) -> StreamingSession:
+        """Streaming STT session for an utterance that arrives as PCM chunks."""
+        return open_session(self.stt_provider, sample_rate, on_interim, segment_seconds)
+
+    # =========================================================================
+    # LLM
+    # =========================================================================
+    async def prompt(self) -> tuple:
+        """
+        (final_prompt, temperature) for this agent. It doesn't depend on the user's message,
+        so callers start it as a task when the turn begins, run it alongside STT and pass
+        the task on. It is built per turn so skill edits apply from the next turn.
+        """
+        return await prepare_prompt(self.agent["system_prompt"], self.skills, self.db, self.user_id)
+
+    async def _prepared(self, prompt: Optional[asyncio.Future]) -> tuple:
+        if prompt is None:
+            return await self.prompt()
+        # Shielded: one cancelled consumer (e.g. an aborted speculation) mustn't cancel
+        # the build the rest of the turn shares
+        return await asyncio.shield(prompt)
+
+    async def stream_llm(self, user_text: str, prompt: Optional[asyncio.Future] = None) -> AsyncIterator[str]:
+        """LLM deltas for user_text; prompt is the turn's prompt() task, if already started."""
+        prepared = await self._prepared(prompt)
+        async with aclosing(stream_response(
+            system_prompt=self.agent["system_prompt"],
+            user_message=user_text,
+            provider=self.llm_provider,
+            prepared=prepared
+        )) as stream:
+            async for delta in stream:
+                yield delta
+
+    async def generate(self, user_text: str, prompt: Optional[asyncio.Future] = None) -> str:
+        """The complete response, for callers that need text only (or generate ahead, e.g. speculation)."""
+        return await generate_response(
+            system_prompt=self.agent["system_prompt"],
+            user_message=user_text,
+            provider=self.llm_provider,
+            prepared=await self._prepared(prompt)
+        )
+
+    # =========================================================================
+    # LLM → TTS
+    # =========================================================================
+    async def respond(
+        self,
+        user_text: str,
+        deltas: Optional[AsyncIterator[str]] = None,
+        overlap: bool = True,
+        prompt: Optional[asyncio.Future] = None
+    ) -> AsyncIterator[dict]:
+        """
+        Events for the reply to user_text. deltas is an LLM stream already under way
+        (e.g. a speculative reply) to use instead of starting one; prompt is the turn's
+        prompt() task, started before STT finished (built here if not given).
+
+        overlap=True: {"type": "response_delta", "segment_index": n} per sentence followed by
+        its audio, synthesized while later sentences are still being generated.
+        overlap=False: the whole response is generated, then synthesized.
+        Both end with {"type": "response"} (full text) and {"type": "audio_complete"}.
+        """
+        events: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        stage = self._respond_overlapped if overlap else self._respond_sequential
+
+        async def run():
+            try:
+                await stage(user_text, deltas, prompt, events)
+            except Exception as e:
+                await events.put(e)
+                return
+            await events.put(None)
+
+        producer = asyncio.create_task(run())
+        try:
+            while True:
+                event = await events.get()
+                if event is None:
+                    break
+                if isinstance(event, Exception):
+                    raise event
+                yield event
+        finally:
+            # Wait for the stages to unwind, so their provider streams are closed when we return
+            producer.cancel()
+            await asyncio.gather(producer, return_exceptions=True)
+
+    async def _respond_overlapped(self, user_text: str, deltas: Optional[AsyncIterator[str]],
+                                  prompt: Optional[asyncio.Future], events: asyncio.Queue):
+        await events.put({"type": "status", "message": "Thinking..."})
+
+        text_queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        response_parts = []
+
+        async def llm_stage():
+            try:
+                async with aclosing(deltas if deltas is not None else self.stream_llm(user_text, prompt)) as stream:
+                    async for delta in stream:
+                        await text_queue.put(delta)
+            except Exception as e:
+                await text_queue.put(e)
+                return
+            await text_queue.put(None)
+
+        async def llm_text():
+            while True:
+                delta = await text_queue.get()
+                if delta is None:
+                    return
+                if isinstance(delta, Exception):
+                    raise delta
+                response_parts.append(delta)
+                yield delta
+
+        llm = asyncio.create_task(llm_stage())
+        try:
+            total_bytes = 0
+            total_chunks = 0
+            current_segment = -1
+            # aclosing: a cancelled turn stops in-flight synthesis now, not at garbage collection
+            async with aclosing(synthesize_pipelined(
+                llm_text(), provider=self.tts_provider, voice_id=self.voice_id
+            )) as audio:
+                async for segment_index, sentence, chunk in audio:
+                    if segment_index != current_segment:
+                        current_segment = segment_index
+                        await events.put({"type": "response_delta", "text": sentence, "segment_index": segment_index})
+                    await events.put({"type": "audio", "data": chunk, "segment_index": segment_index})
+                    total_bytes += len(chunk)
+                    total_chunks += 1
+        finally:
+            llm.cancel()
+            await asyncio.gather(llm, return_exceptions=True)
+
+        await events.put({"type": "response", "text": "".join(response_parts)})
+        await events.put({"type": "audio_complete", "total_bytes": total_bytes, "total_chunks": total_chunks})
+
+    async def _respond_sequential(self, user_text: str, deltas: Optional[AsyncIterator[str]],
+                                  prompt: Optional[asyncio.Future], events: asyncio.Queue):
+        await events.put({"type": "status", "message": "Thinking..."})
+        if deltas is not None:
+            async with aclosing(deltas) as stream:
+                response = "".join([delta async for delta in stream])
+        else:
+            response = await self.generate(user_text, prompt)
+        await events.put({"type": "response", "text": response})
+        print(f"[PIPELINE] Response: {response[:50]}...")
+
+        await events.put({"type": "status", "message": "Synthesizing..."})
+        tts_text = clean_text_for_tts(response)
+        # Long replies synthesize in sentence groups in parallel
+        speech = stream_speech_long if len(tts_text) > settings.TTS_LONG_TEXT_CHARS else stream_speech
+
+        total_bytes = 0
+        total_chunks = 0
+        async with aclosing(speech(tts_text, provider=self.tts_provider, voice_id=self.voice_id)) as audio:
+            async for chunk in audio:
+                await events.put({"type": "audio", "data": chunk, "segment_index": None})
+                total_bytes += len(chunk)
+                total_chunks += 1
+
+        await events.put({"type": "audio_complete", "total_bytes": total_bytes, "total_chunks": total_chunks})
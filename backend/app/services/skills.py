@@ -1,40 +1,119 @@
 """
 Skill Loader Service - Loads skills from database for LLM context
+All of an agent's skills resolve in a single $in query, and the joined prompt
+is cached per (user, skill IDs, skill versions) until a skill changes.
 """
-from typing import Optional, List
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, List
 from bson import ObjectId
+from ..config import settings
 
+SKILL_SEPARATOR = "\n\n---\n\n"
 
-async def get_skill_content_from_db(db, skill_id: str, user_id: str) -> Optional[str]:
-    """
-    Load skill content from database.
-    Returns the markdown content (after frontmatter).
-    """
-    if not ObjectId.is_valid(skill_id):
-        return None
-    
-    skill = await db.skills.find_one({
-        "_id": ObjectId(skill_id),
-        "$or": [
-            {"user_id": user_id},
-            {"is_system": True}
-        ]
-    })
-    
-    if not skill:
-        return None
-    
-    content = skill.get("content", "")
-    
-    # Remove YAML frontmatter, return body only
+
+def strip_frontmatter(content: str) -> str:
+    """Remove YAML frontmatter, return body only."""
     if content.startswith("---"):
         parts = content.split("---", 2)
         if len(parts) >= 3:
             return parts[2].strip()
-    
+
     return content
 
 
+class SkillPromptCache:
+    """
+    LRU cache of compiled skill prompts.
+    Each skill has an in-process version that routes/skills.py bumps on update or
+    delete, so cached prompts containing that skill are never served again.
+    A TTL bounds staleness for edits made by other workers.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._versions: Dict[str, int] = {}
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def key(self, user_id: str, skill_ids: List[str]) -> tuple:
+        return (user_id, tuple((skill_id, self._versions.get(skill_id, 0)) for skill_id in skill_ids))
+
+    def get(self, key: tuple) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None or time.monotonic() - entry[1] > self.ttl_seconds:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def put(self, key: tuple, prompt: str):
+        self._entries[key] = (prompt, time.monotonic())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, skill_id: str):
+        """Bump the skill's version; entries keyed on the old version age out of the LRU."""
+        self._versions[skill_id] = self._versions.get(skill_id, 0) + 1
+        self.invalidations += 1
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+        }
+
+
+skill_prompt_cache = SkillPromptCache(
+    max_entries=settings.SKILL_PROMPT_CACHE_SIZE,
+    ttl_seconds=settings.SKILL_PROMPT_CACHE_TTL
+)
+
+
+async def get_skills_content_from_db(db, skill_ids: List[str], user_id: str) -> Dict[str, str]:
+    """
+    Load several skills' content with a single query.
+    Returns {skill_id: markdown body (after frontmatter)} for skills the user can access.
+    """
+    object_ids = [ObjectId(skill_id) for skill_id in skill_ids if ObjectId.is_valid(skill_id)]
+    if not object_ids:
+        return {}
+
+    cursor = db.skills.find(
+        {
+            "_id": {"$in": object_ids},
+            "$or": [
+                {"user_id": user_id},
+                {"is_system": True}
+            ]
+        },
+        {"content": 1}
+    )
+
+    return {
+        str(skill["_id"]): strip_frontmatter(skill.get("content", ""))
+        async for skill in cursor
+    }
+
+
+async def get_skill_content_from_db(db, skill_id: str, user_id: str) -> Optional[str]:
+    """
+    Load skill content from database.
+    Returns the markdown content (after frontmatter).
+    """
+    contents = await get_skills_content_from_db(db, [skill_id], user_id)
+    return contents.get(skill_id)
+
+
 async def build_skill_prompt_from_db(db, skill_ids: List[str], user_id: str) -> str:
     """
     Build a combined prompt from multiple skills stored in database.
@@ -42,18 +121,20 @@ async def build_skill_prompt_from_db(db, skill_ids: List[str], user_id: str) ->
     """
     if not skill_ids:
         return ""
-    
-    skill_prompts = []
-    
-    for skill_id in skill_ids:
-        content = await get_skill_content_from_db(db, skill_id, user_id)
-        if content:
-            skill_prompts.append(content)
-    
-    if not skill_prompts:
-        return ""
-    
-    return "\n\n---\n\n".join(skill_prompts)
+
+    key = skill_prompt_cache.key(user_id, skill_ids)
+    cached = skill_prompt_cache.get(key)
+    if cached is not None:
+        return cached
+
+    contents = await get_skills_content_from_db(db, skill_ids, user_id)
+
+    # Keep the agent's skill order, skipping missing or empty skills
+    skill_prompts = [contents[skill_id] for skill_id in skill_ids if contents.get(skill_id)]
+    prompt = SKILL_SEPARATOR.join(skill_prompts)
+
+    skill_prompt_cache.put(key, prompt)
+    return prompt
 
 
 def build_skill_prompt(skills: List[str]) -> str:
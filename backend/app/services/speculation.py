@@ -0,0 +1,212 @@
+"""
+Speculative LLM generation - Start the response before the user has finished
+While a streamed utterance is paused, the LLM is started (streaming) on the interim
+transcript and its deltas are buffered. If the final transcript matches closely enough,
+the turn replays the buffer and keeps streaming the rest through the sentence pipeline;
+otherwise the speculative stream is cancelled and the turn runs as usual.
+
+Each speculation that isn't used is an extra LLM call, so hit rate and latency saved
+are tracked per agent (GET /api/health/speculation) to judge whether it pays off.
+Latency saved is measured on time to first sentence (when TTS can start), against
+starting the same stream at the final transcript.
+"""
+import asyncio
+import re
+import time
+from contextlib import aclosing
+from difflib import SequenceMatcher
+from typing import AsyncIterator, Callable, Optional
+from ..config import settings
+from ..utils.text_processing import SentenceBuffer
+
+WORD = re.compile(r"[\w']+")
+
+
+def normalize_words(text: str) -> list:
+    """Lowercase words without punctuation; interim and final results differ mostly in formatting."""
+    return WORD.findall(text.lower())
+
+
+def transcripts_match(speculated: str, final: str, threshold: float) -> bool:
+    a, b = normalize_words(speculated), normalize_words(final)
+    if a == b:
+        return True
+    if not a or not b:
+        return False
+    return SequenceMatcher(None, a, b, autojunk=False).ratio() >= threshold
+
+
+class SpeculativeStream:
+    """One speculative LLM stream, buffered so it can be replayed from the start."""
+
+    def __init__(self, stream: AsyncIterator[str]):
+        self.deltas = []
+        self.done = False
+        self.error: Optional[Exception] = None
+        self.started_at = time.perf_counter()
+        # When the first complete sentence (or the whole reply, if shorter) had arrived
+        self.first_sentence_at: Optional[float] = None
+        self.first_sentence = asyncio.Event()
+        self._changed = asyncio.Event()
+        self.task = asyncio.create_task(self._run(stream))
+
+    async def _run(self, stream: AsyncIterator[str]):
+        sentences = SentenceBuffer()
+        try:
+            async with aclosing(stream):
+                async for delta in stream:
+                    self.deltas.append(delta)
+                    if self.first_sentence_at is None and sentences.feed(delta):
+                        self._first_sentence()
+                    self._changed.set()
+            if self.first_sentence_at is None:
+                # Shorter than a sentence: the whole reply is the first one
+                self._first_sentence()
+        except Exception as e:
+            self.error = e
+        finally:
+            self.done = True
+            self.first_sentence.set()
+            self._changed.set()
+
+    def _first_sentence(self):
+        self.first_sentence_at = time.perf_counter()
+        self.first_sentence.set()
+
+    async def replay(self) -> AsyncIterator[str]:
+        """Every delta so far, then the rest as it is generated."""
+        index = 0
+        while True:
+            while index < len(self.deltas):
+                yield self.deltas[index]
+                index += 1
+            if self.done:
+                if self.error is not None:
+                    raise self.error
+                return
+            self._changed.clear()
+            await self._changed.wait()
+
+    def cancel(self):
+        self.task.cancel()
+
+
+class Speculator:
+    """
+    Speculation for one utterance. speculate() (re)starts a stream on an interim
+    transcript, abort() drops it when the user keeps talking, and resolve() decides
+    against the final transcript.
+    """
+
+    def __init__(self, stream: Callable[[str], AsyncIterator[str]]):
+        self.stream = stream
+        self.current: Optional[SpeculativeStream] = None
+        self.words: Optional[list] = None
+        self.text: Optional[str] = None
+        self.generations = 0
+        # Set by resolve()
+        self.outcome = "none"
+        self.saved_ms = 0.0
+
+    def speculate(self, transcript: str):
+        words = normalize_words(transcript)
+        if not words or words == self.words:
+            return
+        self.abort()
+        self.words = words
+        self.text = transcript
+        self.generations += 1
+        self.current = SpeculativeStream(self.stream(transcript))
+
+    def abort(self):
+        if self.current is not None:
+            self.current.cancel()
+        self.current = None
+        self.words = None
+        self.text = None
+
+    async def resolve(self, final_transcript: str) -> Optional[AsyncIterator[str]]:
+        """
+        On a hit, the speculative reply's deltas (replayed, then streamed live), else None.
+        Waits for the speculative first sentence, which the turn can't speak before anyway,
+        so a stream that fails early is a miss and the turn still runs normally.
+
+        Latency saved: without speculation the first sentence would arrive its generation
+        time after the final transcript; with it, it arrives at the later of the final
+        transcript and the speculative first sentence. That is the smaller of the time to
+        first sentence and how long the stream had been running at the final transcript.
+        """
+        speculation = self.current
+        if speculation is None:
+            return None
+
+        resolved_at = time.perf_counter()
+        if not transcripts_match(self.text, final_transcript, settings.LLM_SPECULATION_MATCH):
+            print(f"[SPEC] Miss: speculated {self.text[:40]!r}, final {final_transcript[:40]!r}")
+            self.abort()
+            self.outcome = "miss"
+            return None
+
+        # Cancelling the turn here leaves the stream to the turn's abort()
+        await speculation.first_sentence.wait()
+        if speculation.first_sentence_at is None:
+            print(f"[SPEC] Speculative generation failed: {str(speculation.error)}")
+            self.abort()
+            self.outcome = "miss"
+            return None
+
+        self.outcome = "hit"
+        first_sentence_ms = speculation.first_sentence_at - speculation.started_at
+        self.saved_ms = min(first_sentence_ms, resolved_at - speculation.started_at) * 1000
+        print(f"[SPEC] Hit: first sentence {self.saved_ms:.0f}ms sooner")
+        return speculation.replay()
+
+
+class SpeculationStats:
+    """Per-agent speculation counters, reported only to the agent's owner."""
+
+    def __init__(self):
+        self._agents = {}
+
+    def record(self, agent: dict, speculator: Speculator):
+        entry = self._agents.setdefault(str(agent.get("_id")), {
+            "user_id": agent.get("user_id"),
+            "turns": 0,
+            "speculated_turns": 0,
+            "hits": 0,
+            "generations": 0,
+            "latency_saved_ms": 0.0,
+        })
+        entry["turns"] += 1
+        entry["generations"] += speculator.generations
+        if speculator.generations:
+            entry["speculated_turns"] += 1
+        if speculator.outcome == "hit":
+            entry["hits"] += 1
+            entry["latency_saved_ms"] += speculator.saved_ms
+
+    def stats(self, user_id: str) -> dict:
+        """Counters for user_id's agents."""
+        agents = {}
+        for agent_id, entry in self._agents.items():
+            if entry["user_id"] != user_id:
+                continue
+            hits = entry["hits"]
+            agents[agent_id] = {
+                "turns": entry["turns"],
+                "speculated_turns": entry["speculated_turns"],
+                "hits": hits,
+                "hit_rate": round(hits / entry["speculated_turns"], 3) if entry["speculated_turns"] else None,
+                # LLM calls beyond the one each turn needs anyway
+                "wasted_generations": entry["generations"] - hits,
+                "avg_latency_saved_ms": round(entry["latency_saved_ms"] / entry["turns"], 1) if entry["turns"] else None,
+                "avg_latency_saved_ms_per_hit": round(entry["latency_saved_ms"] / hits, 1) if hits else None,
+            }
+        return {
+            "enabled_by_default": settings.LLM_SPECULATION_ENABLED,
+            "match_threshold": settings.LLM_SPECULATION_MATCH,
+            "agents": agents,
+        }
+
+
+speculation_stats = SpeculationStats()
@@ -0,0 +1,271 @@
+"""
+Streaming STT - Incremental audio ingestion with server-side endpointing
+Audio arrives as 16-bit mono PCM chunks while the user is still speaking.
+An energy VAD (Endpointer) decides when the utterance is over, and a session
+transcribes as data arrives so transcription overlaps with speech:
+
+- DeepgramLiveSession: Deepgram's live WebSocket API (interim + final results)
+- SegmentingSession: local stand-in for batch providers (Groq Whisper). Completed
+  stretches of speech are cut at natural pauses and transcribed in the background,
+  so only the tail remains to transcribe at the endpoint.
+"""
+import asyncio
+import io
+import json
+import wave
+from abc import ABC, abstractmethod
+from typing import Callable, Optional
+from ..config import settings
+from .audio import frame_levels, np, VAD_FRAME_MS
+from .stt import transcribe_bytes
+
+SAMPLE_WIDTH = 2  # 16-bit PCM
+
+
+def streaming_available() -> bool:
+    return np is not None
+
+
+def has_speech(pcm: bytes, sample_rate: int) -> bool:
+    """True if any VAD frame of the PCM is above the silence threshold."""
+    samples = np.frombuffer(pcm[:len(pcm) - len(pcm) % SAMPLE_WIDTH], dtype="<i2").astype(np.float32) / 32768.0
+    levels, _ = frame_levels(samples, sample_rate)
+    return bool((levels > settings.STT_VAD_THRESHOLD_DB).any())
+
+
+def join_transcripts(parts: list) -> str:
+    """Segments don't overlap, so their transcripts are simply concatenated."""
+    return " ".join(part.strip() for part in parts if part and part.strip())
+
+
+def pcm_to_wav(pcm: bytes, sample_rate: int) -> bytes:
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(SAMPLE_WIDTH)
+        wav.setframerate(sample_rate)
+        wav.writeframes(pcm)
+    return buffer.getvalue()
+
+
+# =============================================================================
+# ENDPOINTING
+# =============================================================================
+class Endpointer:
+    """
+    Energy VAD over fixed frames, vectorized per chunk.
+    feed() returns the events the chunk produced, in order:
+    "speech_start" on the first voiced frame, "pause" each time speech is followed by
+    STT_PAUSE_MS of silence, "resume" when speech continues after a pause, and
+    "endpoint" once STT_ENDPOINT_SILENCE_MS of silence
+    follows at least STT_MIN_SPEECH_MS of speech (or the utterance hits the duration cap).
+    """
+
+    def __init__(self, sample_rate: int):
+        self.sample_rate = sample_rate
+        self.frame_bytes = sample_rate * VAD_FRAME_MS // 1000 * SAMPLE_WIDTH
+        self.threshold_db = settings.STT_VAD_THRESHOLD_DB
+        self.pause_frames = settings.STT_PAUSE_MS // VAD_FRAME_MS
+        self.endpoint_frames = settings.STT_ENDPOINT_SILENCE_MS // VAD_FRAME_MS
+        self.min_speech_frames = settings.STT_MIN_SPEECH_MS // VAD_FRAME_MS
+        self.max_frames = int(settings.STT_MAX_DURATION_SECONDS * 1000 / VAD_FRAME_MS)
+
+        self._carry = b""
+        self.frames = 0
+        self.speech_frames = 0
+        self.silence_run = 0
+        self.ended = False
+
+    def feed(self, pcm: bytes) -> list:
+        if self.ended:
+            return []
+
+        data = self._carry + pcm
+        usable = len(data) - len(data) % self.frame_bytes
+        self._carry = data[usable:]
+        if not usable:
+            return []
+
+        samples = np.frombuffer(data[:usable], dtype="<i2").astype(np.float32) / 32768.0
+        levels, _ = frame_levels(samples, self.sample_rate)
+        voiced = levels > self.threshold_db
+
+        events = []
+        for is_voiced in voiced.tolist():
+            self.frames += 1
+            if is_voiced:
+                if self.speech_frames == 0:
+                    events.append("speech_start")
+                elif self.silence_run >= self.pause_frames:
+                    events.append("resume")
+                self.speech_frames += 1
+                self.silence_run = 0
+                continue
+
+            self.silence_run += 1
+            if self.speech_frames and self.silence_run == self.pause_frames:
+                events.append("pause")
+            if self.speech_frames >= self.min_speech_frames and self.silence_run >= self.endpoint_frames:
+                events.append("endpoint")
+                self.ended = True
+                return events
+
+        if self.frames >= self.max_frames:
+            events.append("endpoint")
+            self.ended = True
+        return events
+
+
+# =============================================================================
+# SESSIONS
+# =============================================================================
+class StreamingSession(ABC):
+    """
+    One utterance's transcription. send() audio as it arrives, mark_pause() at
+    natural pauses, finish() at the endpoint for the final transcript.
+    on_interim(text) is called with the best transcript so far whenever it improves.
+    """
+
+    def __init__(self, sample_rate: int, on_interim: Optional[Callable[[str], None]] = None):
+        self.sample_rate = sample_rate
+        self.on_interim = on_interim
+
+    async def start(self):
+        pass
+
+    @abstractmethod
+    async def send(self, pcm: bytes):
+        ...
+
+    def mark_pause(self):
+        pass
+
+    @abstractmethod
+    async def finish(self) -> str:
+        ...
+
+    async def aclose(self):
+        pass
+
+
+class SegmentingSession(StreamingSession):
+    """
+    Batch-provider stand-in for a live API. Audio is buffered; at a pause after at
+    least segment_seconds (default STT_STREAM_SEGMENT_SECONDS) of audio, the buffered
+    stretch is transcribed in the background. finish() transcribes the tail, unless it
+    is only silence, and joins the segments' transcripts in order.
+    """
+
+    def __init__(self, sample_rate: int, provider: str = "groq_whisper", on_interim=None,
+                 segment_seconds: Optional[float] = None):
+        super().__init__(sample_rate, on_interim)
+        self.provider = provider
+        if segment_seconds is None:
+            segment_seconds = settings.STT_STREAM_SEGMENT_SECONDS
+        self.segment_bytes = int(segment_seconds * sample_rate) * SAMPLE_WIDTH
+        self._pending = bytearray()
+        self._tasks = []
+        self._texts = {}
+
+    async def send(self, pcm: bytes):
+        self._pending.extend(pcm)
+
+    def mark_pause(self):
+        # Cut at the pause: the segment boundary falls in silence, so nothing is split mid-word
+        if len(self._pending) >= self.segment_bytes:
+            self._start_segment()
+
+    def _start_segment(self):
+        pcm, self._pending = bytes(self._pending), bytearray()
+        self._tasks.append(asyncio.create_task(self._transcribe(len(self._tasks), pcm)))
+
+    async def _transcribe(self, index: int, pcm: bytes) -> str:
+        wav = pcm_to_wav(pcm, self.sample_rate)
+        text = await transcribe_bytes(wav, "segment.wav", "audio/wav", self.provider)
+        self._texts[index] = text
+        if self.on_interim:
+            # Everything transcribed so far without gaps, in order
+            ready = []
+            while len(ready) in self._texts:
+                ready.append(self._texts[len(ready)])
+            if ready:
+                self.on_interim(join_transcripts(ready))
+        return text
+
+    async def finish(self) -> str:
+        if self._pending and has_speech(bytes(self._pending), self.sample_rate):
+            self._start_segment()
+        parts = await asyncio.gather(*self._tasks)
+        return join_transcripts(parts)
+
+    async def aclose(self):
+        for task in self._tasks:
+            task.cancel()
+
+
+class DeepgramLiveSession(StreamingSession):
+    """Deepgram live transcription: audio is forwarded over a WebSocket as it arrives."""
+
+    URL = "wss://api.deepgram.com/v1/listen"
+
+    def __init__(self, sample_rate: int, on_interim=None):
+        super().__init__(sample_rate, on_interim)
+        self._ws = None
+        self._reader: Optional[asyncio.Task] = None
+        self._finals = []
+
+    async def start(self):
+        from websockets.asyncio.client import connect
+
+        params = (
+            f"model=nova-2&smart_format=true&interim_results=true"
+            f"&encoding=linear16&sample_rate={self.sample_rate}&channels=1"
+        )
+        self._ws = await connect(
+            f"{self.URL}?{params}",
+            additional_headers={"Authorization": f"Token {settings.DEEPGRAM_API_KEY}"},
+            open_timeout=settings.HTTP_CONNECT_TIMEOUT
+        )
+        self._reader = asyncio.create_task(self._read())
+
+    async def _read(self):
+        async for raw in self._ws:
+            message = json.loads(raw)
+            if message.get("type") != "Results":
+                continue
+            transcript = message["channel"]["alternatives"][0]["transcript"]
+            if message.get("is_final"):
+                if transcript:
+                    self._finals.append(transcript)
+                interim = " ".join(self._finals)
+            else:
+                interim = " ".join(self._finals + [transcript])
+            if self.on_interim and interim:
+                self.on_interim(interim)
+
+    async def send(self, pcm: bytes):
+        await self._ws.send(pcm)
+
+    async def finish(self) -> str:
+        # CloseStream flushes the final results, then Deepgram closes the socket
+        await self._ws.send(json.dumps({"type": "CloseStream"}))
+        await asyncio.wait_for(self._reader, timeout=10)
+        return " ".join(self._finals).strip()
+
+    async def aclose(self):
+        if self._reader is not None:
+            self._reader.cancel()
+        if self._ws is not None:
+            await self._ws.close()
+
+
+def open_session(provider: str, sample_rate: int, on_interim=None,
+                 segment_seconds: Optional[float] = None) -> StreamingSession:
+    """
+    Deepgram live when the agent uses Deepgram and a key is configured; otherwise the
+    segmenting stand-in. segment_seconds=0 cuts a segment at every pause, so an interim
+    transcript exists at each pause (costs more STT requests).
+    """
+    if provider == "deepgram" and settings.DEEPGRAM_API_KEY:
+        return DeepgramLiveSession(sample_rate, on_interim)
+    return SegmentingSession(sample_rate, provider, on_interim, segment_seconds)
@@ -2,23 +2,122 @@
 Speech-to-Text Service with Groq Whisper and Deepgram support
 Uses API keys from .env file.
 """
-import httpx
+import asyncio
+import os
+import re
+import struct
+from typing import AsyncIterator, BinaryIO, Optional, Union
 from fastapi import UploadFile, HTTPException
 from ..config import settings
+from .http_clients import get_http_client
+from .audio import audio_preprocessor, PreprocessedAudio, split_at_silence, encode, probe_duration, TARGET_SAMPLE_RATE
 
+UPLOAD_CHUNK_SIZE = 64 * 1024
 
-async def transcribe_groq_whisper(audio_bytes: bytes, filename: str, mime_type: str) -> str:
+# Raw bytes, a seekable file (Groq multipart), or an async byte stream (Deepgram body)
+AudioSource = Union[bytes, BinaryIO, AsyncIterator[bytes]]
+
+
+# =============================================================================
+# UPLOAD LIMITS
+# =============================================================================
+def wav_duration(header: bytes, total_size: int) -> Optional[float]:
+    """Duration of a PCM WAV from its header, or None if the header isn't RIFF/WAVE or is malformed."""
+    if len(header) < 12 or header[:4] != b"RIFF" or header[8:12] != b"WAVE":
+        return None
+
+    byte_rate = None
+    pos = 12
+    while pos + 8 <= len(header):
+        chunk_id = header[pos:pos + 4]
+        chunk_size = struct.unpack("<I", header[pos + 4:pos + 8])[0]
+        if chunk_id == b"fmt ":
+            # Byte rate is bytes 8-12 of the fmt body; a truncated fmt chunk is malformed
+            if pos + 20 > len(header):
+                return None
+            byte_rate = struct.unpack("<I", header[pos + 16:pos + 20])[0]
+        elif chunk_id == b"data":
+            if not byte_rate:
+                return None
+            # Streamed WAVs leave the size unset; fall back to the file size
+            data_size = min(chunk_size, total_size - pos - 8)
+            return data_size / byte_rate
+        pos += 8 + chunk_size + (chunk_size & 1)
+    return None
+
+
+def check_audio_limits(total_size: int, header: bytes):
+    """Reject audio over STT_MAX_UPLOAD_BYTES, or over STT_MAX_DURATION_SECONDS where the header tells us."""
+    if total_size > settings.STT_MAX_UPLOAD_BYTES:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Audio too large: {total_size} bytes (max {settings.STT_MAX_UPLOAD_BYTES})"
+        )
+
+    # Other containers are checked by check_audio_duration()
+    reject_duration(wav_duration(header, total_size))
+
+
+def reject_duration(duration: Optional[float]):
+    if duration is not None and duration > settings.STT_MAX_DURATION_SECONDS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Audio too long: {duration:.0f}s (max {settings.STT_MAX_DURATION_SECONDS:.0f}s)"
+        )
+
+
+async def check_audio_duration(source: Union[bytes, BinaryIO]):
+    """
+    Enforce STT_MAX_DURATION_SECONDS for any container. With preprocessing on it is
+    enforced while decoding (services/audio.py); otherwise the container is probed,
+    which needs PyAV: without it only WAV durations are checked.
+    """
+    if audio_preprocessor.available:
+        return
+    try:
+        duration = await asyncio.to_thread(probe_duration, source)
+    finally:
+        if not isinstance(source, bytes):
+            source.seek(0)
+    reject_duration(duration)
+
+
+def upload_size(file: UploadFile) -> int:
+    """Size of the spooled upload without reading it into memory."""
+    if file.size is not None:
+        return file.size
+    position = file.file.tell()
+    file.file.seek(0, os.SEEK_END)
+    size = file.file.tell()
+    file.file.seek(position)
+    return size
+
+
+async def iter_upload(file: UploadFile) -> AsyncIterator[bytes]:
+    """Stream the spooled upload in UPLOAD_CHUNK_SIZE pieces."""
+    await file.seek(0)
+    while True:
+        chunk = await file.read(UPLOAD_CHUNK_SIZE)
+        if not chunk:
+            break
+        yield chunk
+
+
+# =============================================================================
+# PROVIDERS
+# =============================================================================
+async def transcribe_groq_whisper(audio: AudioSource, filename: str, mime_type: str) -> str:
     """Groq Whisper (Fast & Free)"""
     if not settings.GROQ_API_KEY:
         raise Exception("GROQ_API_KEY not configured in .env")
     
-    async with httpx.AsyncClient(timeout=60.0) as client:
-        response = await client.post(
-            "https://api.groq.com/openai/v1/audio/transcriptions",
-            headers={"Authorization": f"Bearer {settings.GROQ_API_KEY}"},
-            files={"file": (filename, audio_bytes, mime_type)},
-            data={"model": "whisper-large-v3"}
-        )
+    client = get_http_client("groq")
+    response = await client.post(
+        "/openai/v1/audio/transcriptions",
+        headers={"Authorization": f"Bearer {settings.GROQ_API_KEY}"},
+        files={"file": (filename, audio, mime_type)},
+        data={"model": "whisper-large-v3"}
+    )
     
     if response.status_code != 200:
         raise Exception(f"Groq Whisper error: {response.text}")
@@ -27,20 +126,20 @@ async def transcribe_groq_whisper(audio_bytes: bytes, filename: str, mime_type:
     return result.get("text", "").strip()
 
 
-async def transcribe_deepgram(audio_bytes: bytes, mime_type: str) -> str:
+async def transcribe_deepgram(audio: AudioSource, mime_type: str) -> str:
     """Deepgram (Real-time capable)"""
     if not settings.DEEPGRAM_API_KEY:
         raise Exception("DEEPGRAM_API_KEY not configured in .env")
     
-    async with httpx.AsyncClient(timeout=60.0) as client:
-        response = await client.post(
-            "https://api.deepgram.com/v1/listen?model=nova-2&smart_format=true",
-            headers={
-                "Authorization": f"Token {settings.DEEPGRAM_API_KEY}",
-                "Content-Type": mime_type
-            },
-            content=audio_bytes
-        )
+    client = get_http_client("deepgram")
+    response = await client.post(
+        "/v1/listen?model=nova-2&smart_format=true",
+        headers={
+            "Authorization": f"Token {settings.DEEPGRAM_API_KEY}",
+            "Content-Type": mime_type
+        },
+        content=audio
+    )
     
     if response.status_code != 200:
         raise Exception(f"Deepgram error: {response.text}")
@@ -49,22 +148,17 @@ async def transcribe_deepgram(audio_bytes: bytes, mime_type: str) -> str:
     return data["results"]["channels"][0]["alternatives"][0]["transcript"]
 
 
-async def transcribe_audio(file: UploadFile, provider: str = "groq_whisper") -> str:
-    """
-    Transcribe audio using specified provider.
-    API keys are loaded from .env file.
-    """
-    audio_bytes = await file.read()
-    filename = file.filename or "audio.webm"
-    mime_type = file.content_type or "audio/webm"
-    
-    print(f"[STT] Received: {len(audio_bytes)} bytes, provider: {provider}")
+async def transcribe_source(audio: AudioSource, filename: str, mime_type: str, provider: str) -> str:
+    if isinstance(audio, bytes) and not audio:
+        # Preprocessing found no speech; nothing worth sending
+        print("[STT] No speech detected")
+        return ""
     
     try:
         if provider == "deepgram":
-            transcript = await transcribe_deepgram(audio_bytes, mime_type)
+            transcript = await transcribe_deepgram(audio, mime_type)
         else:  # Default to groq_whisper
-            transcript = await transcribe_groq_whisper(audio_bytes, filename, mime_type)
+            transcript = await transcribe_groq_whisper(audio, filename, mime_type)
         
         print(f"[STT] Transcript: {transcript[:50]}...")
         return transcript
@@ -72,3 +166,147 @@ async def transcribe_audio(file: UploadFile, provider: str = "groq_whisper") ->
     except Exception as e:
         print(f"[STT] Error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Transcription failed: {str(e)}")
+
+
+# =============================================================================
+# LONG-AUDIO MODE - parallel segmented transcription
+# =============================================================================
+def _normalize_word(word: str) -> str:
+    return re.sub(r"[^\w']", "", word.lower())
+
+
+def stitch_transcripts(parts: list, max_overlap_words: int = 8) -> str:
+    """
+    Join segment transcripts in order. Segments overlap slightly, so the words at the
+    start of each one may repeat the end of the previous; the longest such run (compared
+    case- and punctuation-insensitively) is dropped from the later segment.
+    """
+    words = []
+    for part in parts:
+        new_words = part.split()
+        if words and new_words:
+            tail = [_normalize_word(w) for w in words[-max_overlap_words:]]
+            head = [_normalize_word(w) for w in new_words[:max_overlap_words]]
+            for size in range(min(len(tail), len(head)), 0, -1):
+                if tail[-size:] == head[:size]:
+                    new_words = new_words[size:]
+                    break
+        words.extend(new_words)
+    return " ".join(words)
+
+
+async def transcribe_segmented(processed: PreprocessedAudio, provider: str) -> str:
+    """
+    Split a long clip at silences, transcribe segments concurrently (at most
+    STT_SEGMENT_CONCURRENCY in flight) and stitch the results in order.
+    If any segment fails the rest are cancelled and the error propagates.
+    """
+    samples = processed.samples
+    bounds = split_at_silence(
+        samples, TARGET_SAMPLE_RATE,
+        settings.STT_SEGMENT_SECONDS, settings.STT_SEGMENT_OVERLAP_MS
+    )
+    output_format = settings.STT_PREPROCESS_FORMAT
+    extension = processed.filename.rsplit(".", 1)[-1]
+    semaphore = asyncio.Semaphore(settings.STT_SEGMENT_CONCURRENCY)
+    
+    async def transcribe_segment(index: int, start: int, end: int) -> str:
+        async with semaphore:
+            audio = await asyncio.to_thread(encode, samples[start:end], TARGET_SAMPLE_RATE, output_format)
+            return await transcribe_source(audio, f"segment_{index}.{extension}", processed.mime_type, provider)
+    
+    print(f"[STT] Long audio: {processed.stats['output_seconds']}s in {len(bounds)} segments")
+    tasks = [
+        asyncio.create_task(transcribe_segment(i, start, end))
+        for i, (start, end) in enumerate(bounds)
+    ]
+    try:
+        parts = await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
+    
+    return stitch_transcripts(parts)
+
+
+async def transcribe_processed(processed: PreprocessedAudio, provider: str) -> str:
+    if processed.stats["segmented"]:
+        return await transcribe_segmented(processed, provider)
+    return await transcribe_source(processed.audio, processed.filename, processed.mime_type, provider)
+
+
+async def transcribe_bytes(audio_bytes: bytes, filename: str = "audio.webm", mime_type: str = "audio/webm", provider: str = "groq_whisper") -> str:
+    """
+    Transcribe in-memory audio using specified provider.
+    API keys are loaded from .env file.
+    """
+    print(f"[STT] Received: {len(audio_bytes)} bytes, provider: {provider}")
+    check_audio_limits(len(audio_bytes), audio_bytes[:4096])
+    await check_audio_duration(audio_bytes)
+    
+    processed = await audio_preprocessor.process(audio_bytes, len(audio_bytes))
+    if processed is not None:
+        return await transcribe_processed(processed, provider)
+    
+    return await transcribe_source(audio_bytes, filename, mime_type, provider)
+
+
+class PreparedUpload:
+    """An upload checked against the limits and preprocessed, ready to send to any provider."""
+
+    def __init__(self, file: UploadFile, filename: str, mime_type: str, total_size: int,
+                 processed: Optional[PreprocessedAudio]):
+        self.file = file
+        self.filename = filename
+        self.mime_type = mime_type
+        self.total_size = total_size
+        self.processed = processed
+
+
+async def prepare_upload(file: UploadFile) -> PreparedUpload:
+    """
+    The provider-independent half of transcribe_audio(): limits and preprocessing.
+    Needs no agent config, so callers can run it while the agent is still loading.
+    """
+    filename = file.filename or "audio.webm"
+    mime_type = file.content_type or "audio/webm"
+    total_size = upload_size(file)
+    
+    await file.seek(0)
+    header = await file.read(4096)
+    check_audio_limits(total_size, header)
+    
+    # Decoded straight from the spool; the compact result replaces the original
+    await file.seek(0)
+    await check_audio_duration(file.file)
+    processed = await audio_preprocessor.process(file.file, total_size)
+    return PreparedUpload(file, filename, mime_type, total_size, processed)
+
+
+async def transcribe_prepared(prepared: PreparedUpload, provider: str = "groq_whisper") -> str:
+    """Send a prepared upload to the provider."""
+    print(f"[STT] Received upload: {prepared.total_size} bytes, provider: {provider}")
+    if prepared.processed is not None:
+        return await transcribe_processed(prepared.processed, provider)
+    
+    file = prepared.file
+    if provider == "deepgram":
+        audio = iter_upload(file)
+    else:
+        # httpx streams file objects into the multipart body chunk by chunk
+        await file.seek(0)
+        audio = file.file
+    
+    return await transcribe_source(audio, prepared.filename, prepared.mime_type, provider)
+
+
+async def transcribe_audio(file: UploadFile, provider: str = "groq_whisper") -> str:
+    """
+    Transcribe an uploaded audio file using specified provider.
+    The upload is checked against the size/duration limits and preprocessed
+    (services/audio.py); if preprocessing doesn't apply, the original is streamed from
+    Starlette's spool (memory up to 1 MB, disk beyond) straight into the provider
+    request, so the clip is never held in memory as a whole.
+    API keys are loaded from .env file.
+    """
+    return await transcribe_prepared(await prepare_upload(file), provider)
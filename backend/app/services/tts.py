@@ -1,84 +1,398 @@
 """
 Text-to-Speech Service with Edge TTS (Free) and ElevenLabs support
 Uses API keys from .env file.
+Audio is streamed chunk by chunk as the provider produces it; the
+synthesize_* functions are collecting wrappers for callers that need full bytes.
+Long texts are split into sentence groups synthesized in parallel and joined
+into one frame-aligned MP3 stream (stream_speech_long).
 """
-import httpx
+import asyncio
 import edge_tts
-import tempfile
-import os
+from typing import AsyncIterator, Tuple
 from fastapi import HTTPException
 from ..config import settings
+from ..utils.text_processing import SentenceBuffer, StreamingTTSNormalizer
+from ..utils.mp3 import audio_start
+from .http_clients import get_http_client
+from .tts_cache import tts_cache
+
+# Edge voice used when ElevenLabs fails
+FALLBACK_PROVIDER = "edge"
+FALLBACK_VOICE = "en-US-ChristopherNeural"
+
+# Give up looking for the first frame after this much data and pass audio through as-is
+MP3_SCAN_LIMIT = 64 * 1024
+
+
+async def stream_edge_tts(text: str, voice: str = "en-US-ChristopherNeural") -> AsyncIterator[bytes]:
+    """Edge TTS (Free, High Quality) - yields MP3 chunks straight from the service"""
+    communicate = edge_tts.Communicate(text, voice)
+
+    async for chunk in communicate.stream():
+        if chunk["type"] == "audio" and chunk["data"]:
+            yield chunk["data"]
+
+
+async def stream_elevenlabs(text: str, voice_id: str = "21m00Tcm4TlvDq8ikWAM") -> AsyncIterator[bytes]:
+    """ElevenLabs TTS - yields MP3 chunks from the streaming endpoint"""
+    if not settings.ELEVENLABS_API_KEY:
+        raise Exception("ELEVENLABS_API_KEY not configured in .env")
+
+    client = get_http_client("elevenlabs")
+    async with client.stream(
+        "POST",
+        f"/v1/text-to-speech/{voice_id}/stream",
+        headers={
+            "xi-api-key": settings.ELEVENLABS_API_KEY,
+            "Content-Type": "application/json"
+        },
+        json={
+            "text": text,
+            "model_id": "eleven_flash_v2_5",
+            "voice_settings": {"stability": 0.5, "similarity_boost": 0.75}
+        }
+    ) as response:
+        if response.status_code != 200:
+            raise Exception(f"ElevenLabs error: {response.status_code}")
+
+        async for chunk in response.aiter_bytes():
+            yield chunk
 
 
 async def synthesize_edge_tts(text: str, voice: str = "en-US-ChristopherNeural") -> bytes:
     """Edge TTS (Free, High Quality)"""
-    communicate = edge_tts.Communicate(text, voice)
-    
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".mp3") as temp_file:
-        temp_path = temp_file.name
-    
-    try:
-        await communicate.save(temp_path)
-        with open(temp_path, "rb") as f:
-            return f.read()
-    finally:
-        if os.path.exists(temp_path):
-            os.unlink(temp_path)
+    return b"".join([chunk async for chunk in stream_edge_tts(text, voice)])
 
 
 async def synthesize_elevenlabs(text: str, voice_id: str = "21m00Tcm4TlvDq8ikWAM") -> bytes:
     """ElevenLabs TTS"""
-    if not settings.ELEVENLABS_API_KEY:
-        raise Exception("ELEVENLABS_API_KEY not configured in .env")
-    
-    async with httpx.AsyncClient(timeout=60.0) as client:
-        response = await client.post(
-            f"https://api.elevenlabs.io/v1/text-to-speech/{voice_id}",
-            headers={
-                "xi-api-key": settings.ELEVENLABS_API_KEY,
-                "Content-Type": "application/json"
-            },
-            json={
-                "text": text,
-                "model_id": "eleven_flash_v2_5",
-                "voice_settings": {"stability": 0.5, "similarity_boost": 0.75}
-            }
-        )
-        
-    if response.status_code != 200:
-        raise Exception(f"ElevenLabs error: {response.status_code}")
-    
-    return response.content
+    return b"".join([chunk async for chunk in stream_elevenlabs(text, voice_id)])
 
 
-async def synthesize_speech(text: str, provider: str = "edge", voice_id: str = "en-US-ChristopherNeural") -> bytes:
+async def stream_speech(
+    text: str,
+    provider: str = "edge",
+    voice_id: str = "en-US-ChristopherNeural",
+    fallback: bool = True
+) -> AsyncIterator[bytes]:
     """
-    Synthesize speech using specified provider.
+    Stream synthesized speech using specified provider.
     Default: Edge TTS (Free)
-    API keys are loaded from .env file.
+    Falls back to Edge TTS if ElevenLabs fails before producing any audio, unless
+    fallback=False (e.g. the cache, which must only store the requested provider's audio).
     """
     print(f"[TTS] Synthesizing {len(text)} chars with provider: {provider}, voice: {voice_id}")
-    
+
+    total = 0
     try:
         if provider == "elevenlabs":
-            audio = await synthesize_elevenlabs(text, voice_id)
+            stream = stream_elevenlabs(text, voice_id)
         else:  # Default to edge
-            audio = await synthesize_edge_tts(text, voice=voice_id)
-        
-        print(f"[TTS] Success: {len(audio)} bytes")
-        return audio
-        
+            stream = stream_edge_tts(text, voice=voice_id)
+
+        async for chunk in stream:
+            total += len(chunk)
+            yield chunk
+
+        print(f"[TTS] Success: {total} bytes")
+        return
+
     except Exception as e:
         print(f"[TTS] Error with {provider}: {str(e)}")
-        
-        # Fallback to Edge TTS if ElevenLabs fails
-        if provider == "elevenlabs":
-            print("[TTS] Falling back to Edge TTS...")
-            try:
-                audio = await synthesize_edge_tts(text)
-                print(f"[TTS] Fallback success: {len(audio)} bytes")
-                return audio
-            except Exception as fallback_error:
-                print(f"[TTS] Fallback failed: {str(fallback_error)}")
-        
-        raise HTTPException(status_code=500, detail=f"TTS failed: {str(e)}")
+        error = e
+
+    # Fallback to Edge TTS if ElevenLabs fails (only if nothing was streamed yet)
+    if fallback and provider == "elevenlabs" and total == 0:
+        print("[TTS] Falling back to Edge TTS...")
+        try:
+            async for chunk in stream_edge_tts(text, voice=FALLBACK_VOICE):
+                total += len(chunk)
+                yield chunk
+            print(f"[TTS] Fallback success: {total} bytes")
+            return
+        except Exception as fallback_error:
+            print(f"[TTS] Fallback failed: {str(fallback_error)}")
+
+    raise HTTPException(status_code=500, detail=f"TTS failed: {str(error)}")
+
+
+async def synthesize_speech(
+    text: str,
+    provider: str = "edge",
+    voice_id: str = "en-US-ChristopherNeural",
+    fallback: bool = True
+) -> bytes:
+    """
+    Synthesize speech using specified provider.
+    Collects stream_speech() into the complete audio bytes; long texts go through
+    stream_speech_long() so sentence groups synthesize in parallel.
+    """
+    if len(text) > settings.TTS_LONG_TEXT_CHARS:
+        return b"".join([chunk async for chunk in stream_speech_long(text, provider, voice_id, fallback)])
+    return b"".join([chunk async for chunk in stream_speech(text, provider, voice_id, fallback)])
+
+
+async def synthesize_speech_cached(text: str, provider: str = "edge", voice_id: str = "en-US-ChristopherNeural") -> bytes:
+    """
+    synthesize_speech() through the content-addressed TTS cache.
+    Use for repeatable text (replays, previews); concurrent identical requests synthesize once.
+    The Edge fallback happens outside the cache lookup, so its audio is stored under
+    the Edge key rather than the provider that failed.
+    """
+    try:
+        return await tts_cache.get_or_synthesize(
+            provider, voice_id, text,
+            lambda: synthesize_speech(text, provider=provider, voice_id=voice_id, fallback=False)
+        )
+    except Exception as e:
+        if provider != "elevenlabs":
+            raise
+        print(f"[TTS] Cached synthesis with {provider} failed ({str(e)}), falling back to Edge TTS...")
+
+    return await tts_cache.get_or_synthesize(
+        FALLBACK_PROVIDER, FALLBACK_VOICE, text,
+        lambda: synthesize_speech(text, provider=FALLBACK_PROVIDER, voice_id=FALLBACK_VOICE, fallback=False)
+    )
+
+
+async def align_mp3(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """Drop the leading ID3 tag / VBR info frame so segments can be concatenated frame-aligned."""
+    buffer = b""
+    async for chunk in chunks:
+        if buffer is None:
+            yield chunk
+            continue
+        buffer += chunk
+        start = audio_start(buffer)
+        if start is None and len(buffer) < MP3_SCAN_LIMIT:
+            continue
+        if buffer[start or 0:]:
+            yield buffer[start or 0:]
+        buffer = None
+    if buffer:
+        yield buffer
+
+
+async def synthesize_ordered(
+    segments: AsyncIterator[str],
+    provider: str = "edge",
+    voice_id: str = "en-US-ChristopherNeural",
+    lookahead: int = None,
+    fallback: bool = True
+) -> AsyncIterator[Tuple[int, str, bytes]]:
+    """
+    Synthesize a stream of TTS-ready text segments concurrently, yielding
+    (index, segment, audio_chunk) strictly in segment order. The segment being played
+    streams live; up to `lookahead` later segments synthesize in the background.
+    Each segment's MP3 is frame-aligned so the chunks concatenate into one stream.
+
+    The Edge fallback is decided once, by the first segment, so the voice and sample
+    rate never change mid-stream: if ElevenLabs fails before producing audio, every
+    segment uses Edge; once it has produced audio, a later failure is raised instead.
+    Later segments wait for that decision (the first segment's first chunk) to start.
+    """
+    lookahead = lookahead or settings.TTS_PIPELINE_LOOKAHEAD
+    pending: asyncio.Queue = asyncio.Queue(maxsize=lookahead)
+    tasks = []
+
+    chosen = asyncio.get_running_loop().create_future()
+    if not (fallback and provider == "elevenlabs"):
+        chosen.set_result((provider, voice_id))
+
+    def choose(choice: tuple):
+        if not chosen.done():
+            chosen.set_result(choice)
+
+    async def stream_segment(tts_text: str, chunks: asyncio.Queue, first: bool):
+        if not first:
+            segment_provider, segment_voice = await chosen
+            async for chunk in align_mp3(stream_speech(tts_text, segment_provider, segment_voice, fallback=False)):
+                await chunks.put(chunk)
+            return
+
+        try:
+            async for chunk in align_mp3(stream_speech(tts_text, provider, voice_id, fallback=False)):
+                choose((provider, voice_id))
+                await chunks.put(chunk)
+        except Exception:
+            if chosen.done():
+                raise
+            print("[TTS] Falling back to Edge TTS for the whole stream...")
+            choose((FALLBACK_PROVIDER, FALLBACK_VOICE))
+            async for chunk in align_mp3(stream_speech(tts_text, FALLBACK_PROVIDER, FALLBACK_VOICE, fallback=False)):
+                await chunks.put(chunk)
+            return
+        choose((provider, voice_id))
+
+    async def synthesize(tts_text: str, chunks: asyncio.Queue, first: bool):
+        try:
+            await stream_segment(tts_text, chunks, first)
+        except Exception as e:
+            await chunks.put(e)
+            return
+        await chunks.put(None)
+
+    async def produce():
+        try:
+            async for tts_text in segments:
+                chunks: asyncio.Queue = asyncio.Queue()
+                # Blocks once `lookahead` segments are queued, throttling synthesis to playback
+                await pending.put((tts_text, chunks))
+                tasks.append(asyncio.create_task(synthesize(tts_text, chunks, first=not tasks)))
+        except Exception as e:
+            # Hand upstream (e.g. LLM) errors to the consumer instead of leaving it waiting
+            await pending.put(e)
+            return
+        await pending.put(None)
+
+    producer = asyncio.create_task(produce())
+    try:
+        index = 0
+        while True:
+            item = await pending.get()
+            if item is None:
+                break
+            if isinstance(item, Exception):
+                raise item
+            segment, chunks = item
+            while True:
+                chunk = await chunks.get()
+                if chunk is None:
+                    break
+                if isinstance(chunk, Exception):
+                    raise chunk
+                yield index, segment, chunk
+            index += 1
+    finally:
+        producer.cancel()
+        for task in tasks:
+            task.cancel()
+
+
+async def synthesize_pipelined(
+    text_stream: AsyncIterator[str],
+    provider: str = "edge",
+    voice_id: str = "en-US-ChristopherNeural",
+    lookahead: int = None
+) -> AsyncIterator[Tuple[int, str, bytes]]:
+    """
+    Sentence-pipelined synthesis over a stream of LLM text deltas.
+    Each complete sentence starts streaming from stream_speech() while later text
+    is still being generated; up to `lookahead` sentences synthesize ahead of playback.
+    Yields (index, sentence, audio_chunk) as chunks arrive, strictly in sentence order.
+    """
+    async def sentences():
+        # Markdown is stripped incrementally; segments match clean_text_for_tts() of the whole reply
+        normalizer = StreamingTTSNormalizer()
+        async for delta in text_stream:
+            for tts_text in normalizer.feed(delta):
+                yield tts_text
+        for tts_text in normalizer.flush():
+            yield tts_text
+
+    async for item in synthesize_ordered(sentences(), provider, voice_id, lookahead):
+        yield item
+
+
+def split_sentence_groups(text: str, max_chars: int) -> list:
+    """Split text into runs of whole sentences of up to max_chars each (a longer sentence stands alone)."""
+    buffer = SentenceBuffer()
+    sentences = buffer.feed(text + " ") + buffer.flush()
+
+    groups = []
+    current = ""
+    for sentence in sentences:
+        if current and len(current) + 1 + len(sentence) > max_chars:
+            groups.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}" if current else sentence
+    if current:
+        groups.append(current)
+    return groups
+
+
+async def stream_speech_long(
+    text: str,
+    provider: str = "edge",
+    voice_id: str = "en-US-ChristopherNeural",
+    fallback: bool = True
+) -> AsyncIterator[bytes]:
+    """
+    Long-text mode: synthesize sentence groups of ~TTS_GROUP_CHARS concurrently
+    (the group being played plus up to TTS_PARALLEL_SYNTHESIS ahead of it) and yield
+    one frame-aligned MP3 stream in order.
+    The first group streams as soon as the provider produces it. The Edge fallback
+    applies to the whole text or not at all (see synthesize_ordered).
+    """
+    groups = split_sentence_groups(text, settings.TTS_GROUP_CHARS)
+    print(f"[TTS] Long text: {len(text)} chars in {len(groups)} groups")
+
+    async def segments():
+        for group in groups:
+            yield group
+
+    async for _, _, chunk in synthesize_ordered(segments(), provider, voice_id, settings.TTS_PARALLEL_SYNTHESIS, fallback):
+        yield chunk
+
+
+async def _stream_long_cached(text: str, provider: str, voice_id: str) -> AsyncIterator[bytes]:
+    """
+    stream_speech_long() through tts_cache.get_or_synthesize(), without fallback.
+    The caller that runs the synthesis streams it as it is produced; cache hits and
+    callers coalesced onto an in-flight synthesis get the complete audio.
+    """
+    chunks: asyncio.Queue = asyncio.Queue()
+    started = asyncio.Event()
+
+    async def synthesize() -> bytes:
+        started.set()
+        collected = []
+        try:
+            async for chunk in stream_speech_long(text, provider, voice_id, fallback=False):
+                collected.append(chunk)
+                chunks.put_nowait(chunk)
+        finally:
+            chunks.put_nowait(None)
+        return b"".join(collected)
+
+    fill = asyncio.create_task(tts_cache.get_or_synthesize(provider, voice_id, text, synthesize))
+    waiter = asyncio.create_task(started.wait())
+    try:
+        await asyncio.wait({fill, waiter}, return_when=asyncio.FIRST_COMPLETED)
+        if started.is_set():
+            while True:
+                chunk = await chunks.get()
+                if chunk is None:
+                    break
+                yield chunk
+            await fill  # Surfaces a synthesis error after the partial stream
+        else:
+            yield await fill
+    finally:
+        waiter.cancel()
+        # The synthesis itself is shielded and finishes in the background for the cache
+        fill.cancel()
+        await asyncio.gather(fill, waiter, return_exceptions=True)
+
+
+async def stream_speech_cached(text: str, provider: str = "edge", voice_id: str = "en-US-ChristopherNeural") -> AsyncIterator[bytes]:
+    """
+    Stream long-text speech through the TTS cache: a hit yields the stored audio, a miss
+    streams stream_speech_long() and stores the result once it completes, and identical
+    concurrent requests share one synthesis. As in synthesize_speech_cached(), the Edge
+    fallback happens outside the cache and only if no audio was streamed yet.
+    """
+    streamed = False
+    try:
+        async for chunk in _stream_long_cached(text, provider, voice_id):
+            streamed = True
+            yield chunk
+        return
+    except Exception as e:
+        if provider != "elevenlabs" or streamed:
+            raise
+        print(f"[TTS] Cached synthesis with {provider} failed ({str(e)}), falling back to Edge TTS...")
+
+    async for chunk in _stream_long_cached(text, FALLBACK_PROVIDER, FALLBACK_VOICE):
+        yield chunk
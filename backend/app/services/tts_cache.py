@@ -0,0 +1,262 @@
+"""
+TTS Audio Cache - Content-addressed cache for synthesized speech
+Keyed by (provider, voice_id, normalized text, output format).
+Two tiers: a byte-bounded in-memory LRU in front of an on-disk store with
+size-based eviction. Concurrent identical misses share a single synthesis.
+"""
+import asyncio
+import hashlib
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Optional
+from ..config import settings
+
+WHITESPACE = re.compile(r'\s+')
+AUDIO_SUFFIX = ".audio"
+# A temp file this old belongs to a write that died (e.g. a crashed worker), not one in progress
+STALE_TEMP_SECONDS = 3600
+
+
+class TTSCache:
+    def __init__(self, memory_bytes: int, disk_dir: str, disk_bytes: int, enabled: bool = True):
+        self.enabled = enabled
+        self.memory_limit = memory_bytes
+        self.disk_dir = disk_dir
+        self.disk_limit = disk_bytes
+
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._memory_bytes = 0
+        self._disk_bytes: Optional[int] = None  # Scanned lazily on first disk access
+        self._inflight: Dict[str, asyncio.Task] = {}
+        # Disk writes and their accounting run in worker threads
+        self._disk_lock = threading.Lock()
+        self._counter_lock = threading.Lock()
+
+        self.counters = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "coalesced": 0,
+            "memory_evictions": 0,
+            "disk_evictions": 0,
+            "errors": 0,
+        }
+
+    def _count(self, name: str):
+        with self._counter_lock:
+            self.counters[name] += 1
+
+    # -------------------------------------------------------------------------
+    # Keys
+    # -------------------------------------------------------------------------
+    @staticmethod
+    def make_key(provider: str, voice_id: str, text: str, output_format: str = "mp3") -> str:
+        normalized = WHITESPACE.sub(" ", text).strip()
+        raw = "\0".join([provider, voice_id or "", normalized, output_format])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, key[:2], f"{key}{AUDIO_SUFFIX}")
+
+    # -------------------------------------------------------------------------
+    # Memory tier
+    # -------------------------------------------------------------------------
+    def _memory_get(self, key: str) -> Optional[bytes]:
+        audio = self._memory.get(key)
+        if audio is not None:
+            self._memory.move_to_end(key)
+        return audio
+
+    def _memory_put(self, key: str, audio: bytes):
+        if len(audio) > self.memory_limit:
+            return
+        if key in self._memory:
+            self._memory_bytes -= len(self._memory.pop(key))
+        self._memory[key] = audio
+        self._memory_bytes += len(audio)
+
+        while self._memory_bytes > self.memory_limit:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+            self._count("memory_evictions")
+
+    # -------------------------------------------------------------------------
+    # Disk tier (blocking helpers, run in a worker thread)
+    # -------------------------------------------------------------------------
+    def _scan_disk(self) -> int:
+        total = 0
+        for root, _, files in os.walk(self.disk_dir):
+            for name in files:
+                if not name.endswith(AUDIO_SUFFIX):
+                    continue
+                try:
+                    total += os.path.getsize(os.path.join(root, name))
+                except OSError:
+                    pass
+        return total
+
+    def _disk_get(self, key: str) -> Optional[bytes]:
+        path = self._disk_path(key)
+        try:
+            with open(path, "rb") as f:
+                audio = f.read()
+            os.utime(path)  # mtime doubles as last-access time for eviction
+            return audio
+        except FileNotFoundError:
+            return None
+
+    def _disk_put(self, key: str, audio: bytes):
+        path = self._disk_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(audio)
+
+        with self._disk_lock:
+            if self._disk_bytes is None:
+                self._disk_bytes = self._scan_disk()
+            try:
+                replaced = os.path.getsize(path)
+            except FileNotFoundError:
+                replaced = 0
+            os.replace(temp_path, path)
+            self._disk_bytes += len(audio) - replaced
+
+            if self._disk_bytes > self.disk_limit:
+                self._evict_disk()
+
+    def _evict_disk(self):
+        """Called with _disk_lock held."""
+        entries = []
+        now = time.time()
+        for root, _, files in os.walk(self.disk_dir):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                if name.endswith(AUDIO_SUFFIX):
+                    entries.append((stat.st_mtime, stat.st_size, path))
+                elif now - stat.st_mtime > STALE_TEMP_SECONDS:
+                    # Leftover from a failed write; in-progress temp files are left alone
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+
+        total = sum(size for _, size, _ in entries)
+        # Evict least recently used down to 90% so we don't rescan on every write
+        target = int(self.disk_limit * 0.9)
+        for _, size, path in sorted(entries):
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+                total -= size
+                self._count("disk_evictions")
+            except OSError:
+                pass
+        self._disk_bytes = total
+
+    # -------------------------------------------------------------------------
+    # Public API
+    # -------------------------------------------------------------------------
+    async def get(self, key: str) -> Optional[bytes]:
+        """Look up both tiers without synthesizing. Disk hits are promoted to memory."""
+        audio = self._memory_get(key)
+        if audio is not None:
+            self._count("memory_hits")
+            return audio
+
+        try:
+            audio = await asyncio.to_thread(self._disk_get, key)
+        except OSError as e:
+            print(f"[TTS CACHE] Disk read failed: {str(e)}")
+            self._count("errors")
+            audio = None
+
+        if audio is not None:
+            self._count("disk_hits")
+            self._memory_put(key, audio)
+        return audio
+
+    async def put(self, key: str, audio: bytes):
+        """Store audio in both tiers."""
+        if not audio:
+            return
+        self._memory_put(key, audio)
+        try:
+            await asyncio.to_thread(self._disk_put, key, audio)
+        except OSError as e:
+            print(f"[TTS CACHE] Disk write failed: {str(e)}")
+            self._count("errors")
+
+    async def get_or_synthesize(
+        self,
+        provider: str,
+        voice_id: str,
+        text: str,
+        synthesize: Callable[[], Awaitable[bytes]],
+        output_format: str = "mp3"
+    ) -> bytes:
+        """
+        Return cached audio or run `synthesize` once for all concurrent callers
+        asking for the same key.
+        """
+        if not self.enabled:
+            return await synthesize()
+
+        key = self.make_key(provider, voice_id, text, output_format)
+
+        audio = await self.get(key)
+        if audio is not None:
+            return audio
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self._count("coalesced")
+        else:
+            self._count("misses")
+
+            async def fill() -> bytes:
+                try:
+                    result = await synthesize()
+                    await self.put(key, result)
+                    return result
+                finally:
+                    self._inflight.pop(key, None)
+
+            task = asyncio.create_task(fill())
+            self._inflight[key] = task
+
+        # Shield so one cancelled caller doesn't abort the synthesis others wait on
+        return await asyncio.shield(task)
+
+    def stats(self) -> dict:
+        with self._counter_lock:
+            counters = dict(self.counters)
+        lookups = counters["memory_hits"] + counters["disk_hits"] + counters["misses"]
+        hits = counters["memory_hits"] + counters["disk_hits"]
+        return {
+            "enabled": self.enabled,
+            **counters,
+            "hit_rate": round(hits / lookups, 3) if lookups else None,
+            "memory_entries": len(self._memory),
+            "memory_bytes": self._memory_bytes,
+            "memory_limit_bytes": self.memory_limit,
+            "disk_bytes": self._disk_bytes,
+            "disk_limit_bytes": self.disk_limit,
+            "inflight": len(self._inflight),
+        }
+
+
+tts_cache = TTSCache(
+    memory_bytes=settings.TTS_CACHE_MEMORY_BYTES,
+    disk_dir=settings.TTS_CACHE_DIR,
+    disk_bytes=settings.TTS_CACHE_DISK_BYTES,
+    enabled=settings.TTS_CACHE_ENABLED,
+)
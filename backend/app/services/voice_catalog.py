@@ -0,0 +1,103 @@
+"""
+Voice Catalog Service - Edge TTS voice list and pre-rendered voice previews
+The voice list is fetched once; previews for configured voices are rendered in
+the background at startup and then served from memory with a strong ETag.
+"""
+import asyncio
+import hashlib
+import edge_tts
+from typing import Dict, List, Optional
+from ..config import settings
+from .tts import synthesize_speech_cached
+
+# Sample text for voice previews. Changing it changes every preview's ETag, so clients
+# pick it up when their cached copy expires (routes/voice_preview.py)
+PREVIEW_TEXT = "Hello! This is a sample of my voice. I'm here to help you with your tasks."
+
+
+class VoicePreview:
+    def __init__(self, voice_id: str, audio: bytes):
+        self.voice_id = voice_id
+        self.audio = audio
+        self.etag = f'"{hashlib.sha256(audio).hexdigest()[:32]}"'
+
+
+class VoiceCatalog:
+    def __init__(self, preview_voices: List[str], concurrency: int = 3):
+        self.preview_voices = preview_voices
+        self.concurrency = concurrency
+        self.voices: List[dict] = []
+        self.previews: Dict[str, VoicePreview] = {}
+        self._voices_loaded = False
+        self._voices_lock = asyncio.Lock()
+        self._warm_task: Optional[asyncio.Task] = None
+
+    async def load_voices(self) -> List[dict]:
+        """Fetch the Edge voice list once per process."""
+        async with self._voices_lock:
+            if not self._voices_loaded:
+                try:
+                    self.voices = [
+                        {
+                            "id": voice["ShortName"],
+                            "name": voice.get("FriendlyName", voice["ShortName"]),
+                            "locale": voice.get("Locale"),
+                            "gender": voice.get("Gender"),
+                        }
+                        for voice in await edge_tts.list_voices()
+                    ]
+                    self._voices_loaded = True
+                    print(f"[VOICES] Loaded {len(self.voices)} Edge voices")
+                except Exception as e:
+                    print(f"[VOICES] Failed to load voice list: {str(e)}")
+        return self.voices
+
+    def is_known_voice(self, voice_id: str) -> bool:
+        """Unknown until the voice list loads; then only listed voices are valid."""
+        if not self._voices_loaded:
+            return True
+        return any(voice["id"] == voice_id for voice in self.voices)
+
+    async def get_preview(self, voice_id: str) -> Optional[VoicePreview]:
+        """Return the preview for a voice, rendering it on first request. None for unknown voices."""
+        preview = self.previews.get(voice_id)
+        if preview is not None:
+            return preview
+
+        if not self.is_known_voice(voice_id):
+            return None
+
+        audio = await synthesize_speech_cached(PREVIEW_TEXT, provider="edge", voice_id=voice_id)
+        preview = VoicePreview(voice_id, audio)
+        self.previews[voice_id] = preview
+        return preview
+
+    async def warm(self):
+        """Load the voice list and pre-render configured previews with bounded concurrency."""
+        await self.load_voices()
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def render(voice_id: str):
+            async with semaphore:
+                try:
+                    await self.get_preview(voice_id)
+                except Exception as e:
+                    print(f"[VOICES] Preview render failed for {voice_id}: {str(e)}")
+
+        await asyncio.gather(*(render(voice_id) for voice_id in self.preview_voices))
+        print(f"[VOICES] Pre-rendered {len(self.previews)}/{len(self.preview_voices)} previews")
+
+    def start(self):
+        """Warm the catalog in the background so startup isn't blocked on Edge TTS."""
+        if self._warm_task is None:
+            self._warm_task = asyncio.create_task(self.warm())
+
+    async def stop(self):
+        if self._warm_task is not None and not self._warm_task.done():
+            self._warm_task.cancel()
+        self._warm_task = None
+
+
+voice_catalog = VoiceCatalog(
+    preview_voices=[v.strip() for v in settings.VOICE_PREVIEW_VOICES.split(",") if v.strip()]
+)
@@ -1,5 +1,10 @@
+import asyncio
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Dict, Optional
+from bson import ObjectId
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
@@ -17,6 +22,71 @@ def verify_password(plain_password, hashed_password):
 def get_password_hash(password):
     return pwd_context.hash(password)
 
+
+# =============================================================================
+# PASSWORD HASHER - pbkdf2 off the event loop
+# =============================================================================
+class PasswordHasher:
+    """
+    Runs pbkdf2 in a small dedicated thread pool (hashlib releases the GIL while hashing).
+    A semaphore caps in-flight hashes at the pool size, so a login burst queues here
+    instead of stalling the event loop or piling work into the executor.
+    """
+
+    def __init__(self, workers: int):
+        self.workers = max(workers, 1)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.in_flight = 0
+        self.waiting = 0
+        self.completed = 0
+        self.max_wait_ms = 0.0
+
+    async def _run(self, func, *args):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="pwhash")
+            self._semaphore = asyncio.Semaphore(self.workers)
+
+        queued_at = time.perf_counter()
+        self.waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+        self.max_wait_ms = max(self.max_wait_ms, (time.perf_counter() - queued_at) * 1000)
+
+        self.in_flight += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+        finally:
+            self.in_flight -= 1
+            self.completed += 1
+            self._semaphore.release()
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run(verify_password, plain_password, hashed_password)
+
+    async def hash(self, password: str) -> str:
+        return await self._run(get_password_hash, password)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+            self._semaphore = None
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "completed": self.completed,
+            "max_wait_ms": round(self.max_wait_ms, 1),
+        }
+
+
+password_hasher = PasswordHasher(workers=settings.PASSWORD_HASH_WORKERS)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     if expires_delta:
@@ -27,12 +97,98 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, settings.JWT_SECRET, algorithm=settings.JWT_ALGORITHM)
     return encoded_jwt
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db = Depends(get_database)):
+
+# =============================================================================
+# PRINCIPAL CACHE - token verification without a database round-trip
+# =============================================================================
+class PrincipalCache:
+    """
+    Bounded TTL caches for the auth fast path:
+    - validated principals keyed by raw token (pure CPU on a hit)
+    - each user's token_version, so revocation checks rarely touch the database
+    Entries live at most PRINCIPAL_CACHE_TTL seconds, which bounds how long a
+    revoked token can still be accepted by another worker.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._principals: "OrderedDict[str, tuple]" = OrderedDict()
+        self._versions: Dict[str, tuple] = {}
+        self.hits = 0
+        self.misses = 0
+        self.version_lookups = 0
+
+    def get(self, token: str) -> Optional[UserResponse]:
+        entry = self._principals.get(token)
+        if entry is None or time.monotonic() > entry[1]:
+            self.misses += 1
+            return None
+        self._principals.move_to_end(token)
+        self.hits += 1
+        return entry[0]
+
+    def put(self, token: str, user: UserResponse, token_expires_at: float):
+        # Never cache past the token's own expiry
+        expires_in = min(self.ttl_seconds, token_expires_at - time.time())
+        if expires_in <= 0:
+            return
+        self._principals[token] = (user, time.monotonic() + expires_in)
+        while len(self._principals) > self.max_entries:
+            self._principals.popitem(last=False)
+
+    async def token_version(self, db, user_id: str) -> Optional[int]:
+        """Current token_version for a user, or None if the user no longer exists."""
+        entry = self._versions.get(user_id)
+        if entry is not None and time.monotonic() - entry[1] <= self.ttl_seconds:
+            return entry[0]
+
+        self.version_lookups += 1
+        user = await db.users.find_one({"_id": ObjectId(user_id)}, {"token_version": 1})
+        version = user.get("token_version", 0) if user else None
+        self._versions[user_id] = (version, time.monotonic())
+        if len(self._versions) > self.max_entries:
+            self._versions.pop(next(iter(self._versions)))
+        return version
+
+    def revoke_user(self, user_id: str):
+        self._versions.pop(user_id, None)
+        for token in [t for t, entry in self._principals.items() if entry[0].id == user_id]:
+            self._principals.pop(token, None)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._principals),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+            "version_lookups": self.version_lookups,
+        }
+
+
+principal_cache = PrincipalCache(
+    max_entries=settings.PRINCIPAL_CACHE_SIZE,
+    ttl_seconds=settings.PRINCIPAL_CACHE_TTL
+)
+
+
+async def authenticate_token(token: str, db) -> UserResponse:
+    """
+    Resolve a JWT to its user.
+    Tokens carrying user_id/tv claims are verified without loading the user;
+    older tokens with only an email fall back to a user lookup.
+    """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+    user = principal_cache.get(token)
+    if user is not None:
+        return user
+
     try:
         payload = jwt.decode(token, settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM])
         email: str = payload.get("sub")
@@ -40,23 +196,29 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db = Depends(get
             raise credentials_exception
     except JWTError:
         raise credentials_exception
-        
-    user = await db.users.find_one({"email": email})
-    if user is None:
-        raise credentials_exception
-        
-    return UserResponse(id=str(user["_id"]), email=user["email"])
 
-def verify_token(token: str) -> dict:
-    """
-    Verify JWT token and return payload (for WebSocket auth).
-    Raises exception if invalid.
-    """
-    try:
-        payload = jwt.decode(token, settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
-            raise HTTPException(status_code=401, detail="Invalid token")
-        return {"email": email, "id": payload.get("user_id")}
-    except JWTError:
-        raise HTTPException(status_code=401, detail="Invalid token")
+    user_id = payload.get("user_id")
+    if user_id and ObjectId.is_valid(user_id):
+        # Revocation check: token must carry the user's current token_version
+        current_version = await principal_cache.token_version(db, user_id)
+        if current_version is None or payload.get("tv", 0) != current_version:
+            raise credentials_exception
+        user = UserResponse(id=user_id, email=email)
+    else:
+        db_user = await db.users.find_one({"email": email})
+        if db_user is None:
+            raise credentials_exception
+        user = UserResponse(id=str(db_user["_id"]), email=db_user["email"])
+
+    principal_cache.put(token, user, payload.get("exp", 0))
+    return user
+
+
+async def revoke_user_tokens(db, user_id: str):
+    """Invalidate every token issued to a user by bumping their token_version."""
+    await db.users.update_one({"_id": ObjectId(user_id)}, {"$inc": {"token_version": 1}})
+    principal_cache.revoke_user(user_id)
+
+
+async def get_current_user(token: str = Depends(oauth2_scheme), db = Depends(get_database)):
+    return await authenticate_token(token, db)
@@ -0,0 +1,31 @@
+"""
+Request body limits enforced before the body is read
+"""
+from starlette.responses import JSONResponse
+
+
+class MaxBodySizeMiddleware:
+    """
+    Rejects requests whose declared Content-Length exceeds max_bytes with a 413,
+    before Starlette spools the multipart body. Chunked bodies without a length
+    are still checked per-file by the STT service after spooling.
+    """
+
+    def __init__(self, app, max_bytes: int, path_prefix: str = "/"):
+        self.app = app
+        self.max_bytes = max_bytes
+        self.path_prefix = path_prefix
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"].startswith(self.path_prefix):
+            for name, value in scope["headers"]:
+                if name == b"content-length":
+                    if value.isdigit() and int(value) > self.max_bytes:
+                        response = JSONResponse(
+                            status_code=413,
+                            content={"detail": f"Request body too large (max {self.max_bytes} bytes)"}
+                        )
+                        await response(scope, receive, send)
+                        return
+                    break
+        await self.app(scope, receive, send)
@@ -0,0 +1,65 @@
+"""
+MP3 frame helpers for joining separately synthesized audio into one stream
+Each provider response starts with its own metadata (ID3v2 tag, Xing/Info/VBRI
+frame describing only that response). Concatenated streams must drop it so
+players see one continuous run of audio frames.
+"""
+from typing import Optional
+
+# Layer III bitrates (kbps) by bitrate index
+BITRATES_MPEG1 = [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320]
+BITRATES_MPEG2 = [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160]
+SAMPLE_RATES = {
+    3: [44100, 48000, 32000],  # MPEG1
+    2: [22050, 24000, 16000],  # MPEG2
+    0: [11025, 12000, 8000],   # MPEG2.5
+}
+VBR_TAGS = (b"Xing", b"Info", b"VBRI")
+
+
+def frame_length(header: bytes) -> Optional[int]:
+    """Byte length of the Layer III frame starting with this 4-byte header, or None if it isn't one."""
+    if len(header) < 4 or header[0] != 0xFF or (header[1] & 0xE0) != 0xE0:
+        return None
+
+    version = (header[1] >> 3) & 0x03
+    layer = (header[1] >> 1) & 0x03
+    bitrate_index = header[2] >> 4
+    sample_rate_index = (header[2] >> 2) & 0x03
+    padding = (header[2] >> 1) & 0x01
+    if version == 1 or layer != 1 or bitrate_index in (0, 15) or sample_rate_index == 3:
+        return None
+
+    sample_rate = SAMPLE_RATES[version][sample_rate_index]
+    if version == 3:
+        return 144 * BITRATES_MPEG1[bitrate_index] * 1000 // sample_rate + padding
+    return 72 * BITRATES_MPEG2[bitrate_index] * 1000 // sample_rate + padding
+
+
+def audio_start(data: bytes) -> Optional[int]:
+    """
+    Offset of the first audio frame, past any ID3v2 tag and VBR info frame.
+    Returns None if more data is needed to tell.
+    """
+    offset = 0
+    if data[:3] == b"ID3":
+        if len(data) < 10:
+            return None
+        size = (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9]
+        footer = 10 if data[5] & 0x10 else 0
+        offset = 10 + size + footer
+
+    while True:
+        if len(data) < offset + 4:
+            return None
+        length = frame_length(data[offset:offset + 4])
+        if length:
+            break
+        offset += 1
+
+    # VBR tags sit inside the first frame (offset 36 at most for Layer III)
+    if len(data) < offset + min(length, 40):
+        return None
+    if any(tag in data[offset:offset + 40] for tag in VBR_TAGS):
+        offset += length
+    return offset
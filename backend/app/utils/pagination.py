@@ -0,0 +1,36 @@
+"""
+Keyset (cursor) pagination helpers for listings ordered by _id
+"""
+from typing import Optional
+from bson import ObjectId
+from fastapi import HTTPException, Query, Response
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 200
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def page_limit(limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE)) -> int:
+    """Dependency for the page size query parameter."""
+    return limit
+
+
+def cursor_filter(cursor: Optional[str]) -> dict:
+    """Mongo filter for rows after the cursor (the last _id of the previous page)."""
+    if cursor is None:
+        return {}
+    if not ObjectId.is_valid(cursor):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return {"_id": {"$gt": ObjectId(cursor)}}
+
+
+async def fetch_page(cursor, limit: int, response: Response) -> list:
+    """
+    Read one page from a Motor cursor sorted by _id and fetched with limit + 1.
+    Sets the X-Next-Cursor header when more rows follow.
+    """
+    rows = await cursor.to_list(length=limit + 1)
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers[NEXT_CURSOR_HEADER] = str(rows[-1]["_id"])
+    return rows
@@ -1,38 +1,199 @@
 import re
 
+# Markdown patterns for clean_text_for_tts
+CODE_BLOCK = re.compile(r'```[\s\S]*?```')
+INLINE_CODE = re.compile(r'`[^`]*`')
+LINK = re.compile(r'\[([^\]]+)\]\([^\)]+\)')
+IMAGE = re.compile(r'!\[[^\]]*\]\([^\)]+\)')
+HEADER = re.compile(r'^#+\s+', re.MULTILINE)
+# Emphasis follows CommonMark's flanking rules: the opening delimiter is followed and the
+# closing one preceded by non-whitespace, and underscores don't open or close inside a
+# word, so "5 * 3" and "user_id" are left alone
+BOLD_STAR = re.compile(r'\*\*([^*\s](?:[^*]*[^*\s])?)\*\*')
+ITALIC_STAR = re.compile(r'\*([^*\s](?:[^*]*[^*\s])?)\*')
+BOLD_UNDERSCORE = re.compile(r'(?<!\w)__([^_\s](?:[^_]*[^_\s])?)__(?!\w)')
+ITALIC_UNDERSCORE = re.compile(r'(?<!\w)_([^_\s](?:[^_]*[^_\s])?)_(?!\w)')
+LIST_MARKER = re.compile(r'^[\*\-\+]\s+', re.MULTILINE)
+BLOCKQUOTE = re.compile(r'^>\s+', re.MULTILINE)
+WHITESPACE = re.compile(r'\s+')
+
+# Inline passes in order: (pattern, replacement)
+INLINE_PASSES = [
+    (CODE_BLOCK, ''),                  # Remove code blocks
+    (INLINE_CODE, ''),
+    (LINK, r'\1'),                     # Remove links [text](url) -> text
+    (IMAGE, ''),                       # Remove images ![alt](url) -> ""
+    (HEADER, ''),                      # Remove headers (#, ##, etc.)
+    (BOLD_STAR, r'\1'),                # **bold**
+    (ITALIC_STAR, r'\1'),              # *italic*
+    (BOLD_UNDERSCORE, r'\1'),          # __bold__
+    (ITALIC_UNDERSCORE, r'\1'),        # _italic_
+]
+
+
 def clean_text_for_tts(text: str) -> str:
     """
     Remove Markdown formatting and special characters that shouldn't be spoken by TTS.
     """
     if not text:
         return ""
-        
-    # Remove code blocks
-    text = re.sub(r'```[\s\S]*?```', '', text)
-    text = re.sub(r'`[^`]*`', '', text)
-    
-    # Remove links [text](url) -> text
-    text = re.sub(r'\[([^\]]+)\]\([^\)]+\)', r'\1', text)
-    
-    # Remove images ![alt](url) -> ""
-    text = re.sub(r'!\[[^\]]*\]\([^\)]+\)', '', text)
-    
-    # Remove headers (#, ##, etc.)
-    text = re.sub(r'^#+\s+', '', text, flags=re.MULTILINE)
-    
-    # Remove bold/italic (*, **, _, __)
-    text = re.sub(r'\*\*([^*]+)\*\*', r'\1', text)  # **bold**
-    text = re.sub(r'\*([^*]+)\*', r'\1', text)      # *italic*
-    text = re.sub(r'__([^_]+)__', r'\1', text)      # __bold__
-    text = re.sub(r'_([^_]+)_', r'\1', text)        # _italic_
     
+    return _strip_line_markers(_strip_inline_markup(text))
+
+
+def _strip_inline_markup(text: str) -> str:
+    for pattern, replacement in INLINE_PASSES:
+        text = pattern.sub(replacement, text)
+    return text
+
+
+def _strip_line_markers(text: str) -> str:
     # Remove list markers (-, *, +) at start of line
-    text = re.sub(r'^[\*\-\+]\s+', '', text, flags=re.MULTILINE)
+    text = LIST_MARKER.sub('', text)
     
     # Remove blockquotes (>)
-    text = re.sub(r'^>\s+', '', text, flags=re.MULTILINE)
+    text = BLOCKQUOTE.sub('', text)
     
     # Remove extra whitespace
-    text = re.sub(r'\s+', ' ', text).strip()
-    
-    return text
+    return WHITESPACE.sub(' ', text).strip()
+
+
+class SentenceBuffer:
+    """
+    Accumulates streamed LLM text and releases complete sentences (or long clauses)
+    so TTS can start on the first sentence while the rest is still being generated.
+    """
+    SENTENCE_END = re.compile(r'[.!?]+["\')\]]*\s+|\n+')
+    CLAUSE_END = re.compile(r'[,;:]\s+')
+
+    def __init__(self, min_sentence_chars: int = 12, min_clause_chars: int = 60):
+        self.min_sentence_chars = min_sentence_chars
+        self.min_clause_chars = min_clause_chars
+        self.buffer = ""
+
+    def feed(self, delta: str) -> list:
+        """Add a text delta and return any sentences that are now complete."""
+        self.buffer += delta
+        sentences = []
+        
+        while True:
+            cut = self._find_cut()
+            if cut is None:
+                break
+            sentence, self.buffer = self.buffer[:cut].strip(), self.buffer[cut:]
+            if sentence:
+                sentences.append(sentence)
+        
+        return sentences
+
+    def flush(self) -> list:
+        """Return whatever text is left once the stream has ended."""
+        sentence, self.buffer = self.buffer.strip(), ""
+        return [sentence] if sentence else []
+
+    def _find_cut(self):
+        for match in self.SENTENCE_END.finditer(self.buffer):
+            if match.end() >= self.min_sentence_chars:
+                return match.end()
+        
+        for match in self.CLAUSE_END.finditer(self.buffer):
+            if match.end() >= self.min_clause_chars:
+                return match.end()
+        
+        return None
+
+
+class StreamingTTSNormalizer:
+    """
+    Incremental clean_text_for_tts for streamed LLM output.
+    Accepts token deltas and releases cleaned, sentence-bounded segments once they are
+    safe to speak. Joining every segment with spaces gives exactly clean_text_for_tts()
+    of the complete text, however the text was chunked.
+
+    A cut falls after a sentence end (or long clause) and the whitespace following it, and
+    is safe when stripping inline markup from the text before it leaves nothing unresolved
+    (``` ` [ or a * or _ that could open emphasis), so no code, link or emphasis can still
+    be closed by later text. Each is checked right after its own pass: a later pass could
+    remove it from the prefix where the full text would have paired it instead.
+    The rest is cleaned with the whitespace character before it, so line-anchored markers
+    (# * - + >) and word boundaries read the same as in the complete text. That holds
+    unless the prefix ends in a marker with nothing after it (e.g. an empty "- " item):
+    removing it would put the rest at a line start for the passes after it, so such a
+    cut isn't safe either.
+    Markup that never closes (e.g. an unmatched "`") holds text back until flush(); a "*"
+    or "_" that can't open emphasis ("5 * 3", "user_id") doesn't.
+    """
+    # Markup an inline pass leaves unresolved, checked after that pass, and markers
+    # running up to the cut: a header before the header pass, list/quote after the last one
+    UNRESOLVED = {
+        CODE_BLOCK: re.compile(r'```'),
+        INLINE_CODE: re.compile(r'`'),
+        IMAGE: re.compile(r'\[|^#+\s+\Z', re.MULTILINE),
+        ITALIC_STAR: re.compile(r'\*(?=[^*\s])'),
+        ITALIC_UNDERSCORE: re.compile(r'(?<!\w)__?(?=[^_\s])|^(?:[\*\-\+]\s+(?:>\s+)?|>\s+)\Z', re.MULTILINE),
+    }
+
+    def __init__(self, min_sentence_chars: int = 12, min_clause_chars: int = 60):
+        self.min_sentence_chars = min_sentence_chars
+        self.min_clause_chars = min_clause_chars
+        self.buffer = ""
+        # The character before the buffer in the full text ("" at the start)
+        self.context = ""
+        # Cuts up to here were rejected; their prefix won't change, so they stay rejected
+        self.rejected_up_to = 0
+
+    def feed(self, delta: str) -> list:
+        """Add a text delta and return any cleaned segments that are now safe to speak."""
+        self.buffer += delta
+        segments = []
+        
+        while True:
+            found = self._find_safe_cut()
+            if found is None:
+                break
+            cut, segment = found
+            self.context = self.buffer[cut - 1]
+            self.buffer = self.buffer[cut:]
+            self.rejected_up_to = 0
+            if segment:
+                segments.append(segment)
+        
+        return segments
+
+    def flush(self) -> list:
+        """Return whatever is left, cleaned, once the stream has ended."""
+        segment, self.buffer = clean_text_for_tts(self.context + self.buffer), ""
+        self.context = ""
+        self.rejected_up_to = 0
+        return [segment] if segment else []
+
+    def _find_safe_cut(self):
+        cuts = {
+            match.end() for match in SentenceBuffer.SENTENCE_END.finditer(self.buffer)
+            if match.end() >= self.min_sentence_chars
+        }
+        cuts |= {
+            match.end() for match in SentenceBuffer.CLAUSE_END.finditer(self.buffer)
+            if match.end() >= self.min_clause_chars
+        }
+        
+        for cut in sorted(cuts):
+            # Take all the whitespace, so no marker's trailing \s+ can reach past the cut
+            cut = len(self.buffer) - len(self.buffer[cut:].lstrip())
+            if cut >= len(self.buffer):
+                break
+            if cut <= self.rejected_up_to:
+                continue
+            stripped = self._strip_resolved(self.context + self.buffer[:cut])
+            if stripped is not None:
+                return cut, _strip_line_markers(stripped)
+            self.rejected_up_to = cut
+
+    def _strip_resolved(self, text: str):
+        """_strip_inline_markup(text), or None if later text could still change it."""
+        for pattern, replacement in INLINE_PASSES:
+            text = pattern.sub(replacement, text)
+            unresolved = self.UNRESOLVED.get(pattern)
+            if unresolved is not None and unresolved.search(text):
+                return None
+        return text
@@ -0,0 +1,42 @@
+"""
+Per-request stage timings, reported in the Server-Timing header and the logs
+"""
+import time
+from contextlib import contextmanager
+from typing import Awaitable
+
+
+class StageTimer:
+    """
+    Wall-clock duration of each named stage of one request. Stages may overlap, so
+    comparing their sum with the elapsed time shows how much concurrency saved.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = (time.perf_counter() - started) * 1000
+
+    async def measure(self, name: str, awaitable: Awaitable):
+        with self.stage(name):
+            return await awaitable
+
+    def mark(self, name: str):
+        """Record the time elapsed since the request started, e.g. the end of setup."""
+        self.stages[name] = (time.perf_counter() - self.started) * 1000
+
+    def server_timing(self) -> str:
+        return ", ".join(f"{name};dur={ms:.1f}" for name, ms in self.stages.items())
+
+    def summary(self, stages: list, total: str) -> str:
+        """e.g. "setup 812ms for 1034ms of work (agent=2 ...)": the critical path vs running stages back to back."""
+        work = sum(self.stages.get(name, 0.0) for name in stages)
+        parts = " ".join(f"{name}={self.stages[name]:.0f}" for name in stages if name in self.stages)
+        return f"{total} {self.stages.get(total, 0.0):.0f}ms for {work:.0f}ms of work ({parts})"
@@ -0,0 +1,100 @@
+"""
+Login throughput benchmark - event-loop health while logins are hashing
+
+Simulates voice turns (short awaits that should resume on time) on the event
+loop while a burst of concurrent logins verifies pbkdf2 passwords, in three modes:
+  idle    - no login load (baseline)
+  inline  - verify_password called directly in the handler (the old behaviour)
+  pool    - password_hasher.verify (dedicated, bounded thread pool)
+
+Voice-turn latency should stay flat with the pool and balloon when inline.
+
+Usage (from backend/):
+    python -m benchmarks.login_throughput [--logins 200] [--concurrency 50] [--turns 100]
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from app.utils.auth import get_password_hash, verify_password, password_hasher
+
+TURN_STEP_MS = 20  # one simulated voice turn: await a 20ms stage
+
+
+def percentile(values, p):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p))]
+
+
+async def voice_turns(count: int, stop: asyncio.Event) -> list:
+    """Measure how late each simulated turn finishes past its ideal TURN_STEP_MS."""
+    latencies = []
+    for _ in range(count):
+        started = time.perf_counter()
+        await asyncio.sleep(TURN_STEP_MS / 1000)
+        latencies.append((time.perf_counter() - started) * 1000)
+        if stop.is_set() and len(latencies) >= count // 2:
+            break
+    return latencies
+
+
+async def login_load(mode: str, logins: int, concurrency: int, password_hash: str) -> float:
+    """Run the login burst. Returns logins per second."""
+    if mode == "idle":
+        return 0.0
+
+    gate = asyncio.Semaphore(concurrency)
+
+    async def one_login():
+        async with gate:
+            if mode == "inline":
+                ok = verify_password("correct horse", password_hash)
+                await asyncio.sleep(0)
+            else:
+                ok = await password_hasher.verify("correct horse", password_hash)
+            assert ok
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one_login() for _ in range(logins)))
+    return logins / (time.perf_counter() - started)
+
+
+async def run_mode(mode: str, args, password_hash: str) -> dict:
+    stop = asyncio.Event()
+    turns = asyncio.create_task(voice_turns(args.turns, stop))
+    await asyncio.sleep(0)
+    throughput = await login_load(mode, args.logins, args.concurrency, password_hash)
+    stop.set()
+    latencies = await turns
+    return {
+        "mode": mode,
+        "logins_per_sec": throughput,
+        "p50": statistics.median(latencies),
+        "p99": percentile(latencies, 0.99),
+        "max": max(latencies),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--turns", type=int, default=100)
+    args = parser.parse_args()
+
+    password_hash = get_password_hash("correct horse")
+    print(f"{args.logins} logins at concurrency {args.concurrency}, "
+          f"{password_hasher.workers} hashing threads, {TURN_STEP_MS}ms voice-turn stage\n")
+    print(f"{'mode':<8}{'logins/s':>10}{'turn p50':>11}{'turn p99':>11}{'turn max':>11}")
+
+    for mode in ("idle", "inline", "pool"):
+        result = await run_mode(mode, args, password_hash)
+        print(f"{result['mode']:<8}{result['logins_per_sec']:>10.1f}"
+              f"{result['p50']:>9.1f}ms{result['p99']:>9.1f}ms{result['max']:>9.1f}ms")
+
+    password_hasher.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,117 @@
+"""
+TTS normalizer benchmark - streaming vs batch markdown cleaning
+
+For a set of typical markdown agent replies, split into LLM-sized token deltas:
+  - checks StreamingTTSNormalizer output (segments joined) equals clean_text_for_tts
+    for many random chunkings
+  - times batch cleaning of the full reply vs feeding the deltas through the normalizer
+  - reports how much of the reply had arrived when the first segment could be spoken
+    (batch cleaning has to wait for all of it)
+
+Usage (from backend/):
+    python -m benchmarks.tts_normalizer [--chunkings 200] [--repeat 200]
+"""
+import argparse
+import random
+import statistics
+import time
+
+from app.utils.text_processing import clean_text_for_tts, StreamingTTSNormalizer
+
+REPLIES = [
+    "Sure! Here's a quick overview.\n\n"
+    "## Getting started\n\n"
+    "1. Install the **CLI** with `pip install tool`.\n"
+    "2. Run it once to create a config file.\n\n"
+    "- The config lives in `~/.tool/config.yaml`.\n"
+    "- See the [documentation](https://example.com/docs) for every option.\n\n"
+    "> Tip: you can _always_ reset it with `tool reset`.\n\n"
+    "Let me know if you'd like a walkthrough of the advanced settings!",
+
+    "Great question. The short answer is **yes**, but there are a few caveats. "
+    "First, the request has to be authenticated. Second, large payloads are rejected. "
+    "Here is an example:\n\n"
+    "```python\nresponse = client.post(\"/upload\", files={\"file\": data})\nprint(response.status_code)\n```\n\n"
+    "If that returns 413, the file is too large. Otherwise you should see 200. "
+    "Would you like me to explain the retry logic as well?",
+
+    "I'd recommend three things: *stretch* every morning, drink more water, and take short walks "
+    "after meals. None of these take long, and together they make a noticeable difference within "
+    "a couple of weeks. Is there one you'd like to start with?",
+
+    "### Summary\n"
+    "* Revenue grew 12% quarter over quarter.\n"
+    "* Costs were flat.\n"
+    "* The new region launched on schedule.\n\n"
+    "Overall, a __strong__ quarter. The main risk is hiring, which is behind plan by about two roles.",
+]
+
+
+def tokenize(text: str, rng: random.Random) -> list:
+    """Split text into LLM-like deltas of 1-8 characters."""
+    deltas = []
+    i = 0
+    while i < len(text):
+        size = rng.randint(1, 8)
+        deltas.append(text[i:i + size])
+        i += size
+    return deltas
+
+
+def stream(deltas: list) -> tuple:
+    """Feed deltas through a normalizer. Returns (segments, chars consumed before the first segment)."""
+    normalizer = StreamingTTSNormalizer()
+    segments = []
+    consumed = 0
+    first_at = None
+    for delta in deltas:
+        consumed += len(delta)
+        out = normalizer.feed(delta)
+        if out and first_at is None:
+            first_at = consumed
+        segments.extend(out)
+    segments.extend(normalizer.flush())
+    return segments, first_at if first_at is not None else consumed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunkings", type=int, default=200, help="random chunkings checked per reply")
+    parser.add_argument("--repeat", type=int, default=200, help="timing iterations per reply")
+    args = parser.parse_args()
+    rng = random.Random(7)
+
+    print(f"{'reply':<7}{'chars':>7}{'match':>8}{'batch':>11}{'stream':>11}{'per delta':>12}{'first seg at':>15}")
+    mismatches = 0
+    for index, reply in enumerate(REPLIES):
+        expected = clean_text_for_tts(reply)
+
+        ok = True
+        first_at = []
+        for _ in range(args.chunkings):
+            segments, first = stream(tokenize(reply, rng))
+            first_at.append(first)
+            if " ".join(segments) != expected:
+                ok = False
+        mismatches += not ok
+
+        started = time.perf_counter()
+        for _ in range(args.repeat):
+            clean_text_for_tts(reply)
+        batch_us = (time.perf_counter() - started) / args.repeat * 1e6
+
+        deltas = tokenize(reply, rng)
+        started = time.perf_counter()
+        for _ in range(args.repeat):
+            stream(deltas)
+        stream_us = (time.perf_counter() - started) / args.repeat * 1e6
+
+        first_pct = statistics.median(first_at) / len(reply) * 100
+        print(f"{index:<7}{len(reply):>7}{'yes' if ok else 'NO':>8}{batch_us:>9.1f}us{stream_us:>9.1f}us"
+              f"{stream_us / len(deltas):>10.2f}us{first_pct:>14.0f}%")
+
+    print("\nOutputs match the batch function" if not mismatches else f"\n{mismatches} replies mismatched")
+
+
+if __name__ == "__main__":
+    main()
@@ -130,6 +130,11 @@ export default function VoiceChatWS() {
     const startRecording = async () => {
         try {
             stopPlayback();
+            if (isProcessing) {
+                // Talking over the agent cancels its in-flight turn
+                wsRef.current?.interrupt();
+                setIsProcessing(false);
+            }
 
             console.log('Starting WAV recording...');
             const recorder = new WavRecorder({ sampleRate: 16000 });
@@ -445,7 +450,7 @@ export default function VoiceChatWS() {
                         onMouseUp={stopRecording}
                         onTouchStart={startRecording}
                         onTouchEnd={stopRecording}
-                        disabled={isProcessing || !wsConnected}
+                        disabled={!wsConnected}
                     >
                         <span className="material-symbols-outlined text-white text-4xl">
                             {isRecording ? 'stop' : isProcessing ? 'hourglass_top' : 'mic'}
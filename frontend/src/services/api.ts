@@ -31,8 +31,22 @@ export const logout = () => {
 
 export const isAuthenticated = () => !!localStorage.getItem('token');
 
+// Listings are paginated by cursor: follow X-Next-Cursor until the last page
+const PAGE_SIZE = 200;
+
+const getAllPages = async <T,>(url: string): Promise<{ data: T[] }> => {
+    const data: T[] = [];
+    let cursor: string | undefined;
+    do {
+        const response = await api.get<T[]>(url, { params: { limit: PAGE_SIZE, cursor } });
+        data.push(...response.data);
+        cursor = response.headers['x-next-cursor'] || undefined;
+    } while (cursor);
+    return { data };
+};
+
 // Agents
-export const getAgents = () => api.get('/agents');
+export const getAgents = () => getAllPages<any>('/agents');
 export const getAgent = (id: string) => api.get(`/agents/${id}`);
 
 export interface AgentData {
@@ -59,7 +73,7 @@ export interface Skill {
     user_id: string;
 }
 
-export const getSkills = () => api.get<Skill[]>('/skills');
+export const getSkills = () => getAllPages<Skill>('/skills');
 export const getSkill = (id: string) => api.get<Skill & { content: string }>(`/skills/${id}`);
 export const createSkill = (data: { name: string; description: string; category: string; content: string }) =>
     api.post('/skills', data);
@@ -99,6 +99,11 @@ export class VoiceWebSocket {
                 this.audioChunks = []; // Clear for next message
                 break;
 
+            case 'interrupted':
+                // Audio from the cancelled turn is discarded
+                this.audioChunks = [];
+                break;
+
             case 'status':
                 this.onStatus?.(message.message);
                 break;
@@ -125,6 +130,12 @@ export class VoiceWebSocket {
         });
     }
 
+    /** Barge-in: cancel the turn the server is still generating or streaming. */
+    interrupt() {
+        this.audioChunks = [];
+        this.send({ type: 'interrupt' });
+    }
+
     private send(message: WebSocketMessage) {
         if (this.ws && this.ws.readyState === WebSocket.OPEN) {
             this.ws.send(JSON.stringify(message));